@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark du lecteur DOCX en flux face au lecteur python-docx historique
+
+Usage : python benchmarks/bench_docx_reader.py [nombre_de_paragraphes]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from utils.docx_stream import read_docx
+from benchmarks.corpus import create_docx
+
+def read_docx_python_docx(path):
+    """Lecteur historique : modèle objet complet, paragraphes uniquement"""
+    doc = Document(path)
+    return "\n".join(p.text for p in doc.paragraphs).strip()
+
+def measure(reader, path, budget=None):
+    """Retourne (durée en s, pic mémoire Python en Mo, nombre de caractères)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = reader(path)
+    if budget is not None:
+        text = text[:budget]
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak / (1024 * 1024), len(text)
+
+def measure_budgeted(path, budget):
+    """Lecture en flux interrompue dès que le budget est atteint"""
+    from utils.docx_stream import iter_docx_chunks
+
+    def reader(p):
+        parts, total = [], 0
+        for chunk in iter_docx_chunks(p):
+            parts.append(chunk)
+            total += len(chunk)
+            if total >= budget:
+                break
+        return "".join(parts)
+
+    return measure(reader, path, budget)
+
+def run_benchmark(paragraphs=20000, budget=5000):
+    print(f"📊 Benchmark DOCX : {paragraphs} paragraphes")
+    work_dir = tempfile.mkdtemp(prefix="docusense_bench_")
+    try:
+        path = os.path.join(work_dir, "rapport.docx")
+        create_docx(path, paragraphs)
+        print(f"📄 Fichier généré : {os.path.getsize(path) / 1024:.0f} Ko")
+
+        results = [
+            ("python-docx (historique)", measure(read_docx_python_docx, path)),
+            ("flux iterparse", measure(read_docx, path)),
+            (f"flux iterparse, budget {budget}", measure_budgeted(path, budget)),
+        ]
+        for name, (duration, peak_mb, chars) in results:
+            print(f"   - {name:32s} {duration * 1000:9.1f} ms  pic {peak_mb:7.1f} Mo  {chars} caractères")
+        return results
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
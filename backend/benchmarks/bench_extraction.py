@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark des lecteurs d'extraction sur un corpus synthétique
+
+Pour chaque lecteur (read_pdf, read_docx, read_eml, read_excel, perform_ocr) et
+chaque taille de document, les mesures sont faites dans un processus neuf :
+percentiles de latence, pic de mémoire résidente et caractères par seconde.
+Le cache et le pool d'extraction sont désactivés pour mesurer le parsing seul.
+
+Usage : python benchmarks/bench_extraction.py [--sizes 10,100] [--repeat 5]
+        [--readers pdf,docx,eml,xlsx,scanned_pdf] [--corpus-dir DIR] [--output resultats.json]
+"""
+
+import os
+import math
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import GENERATORS, generate
+
+try:
+    import resource
+except ImportError:  # Windows : pic mémoire non mesuré
+    resource = None
+
+# Lecteur mesuré pour chaque type de document du corpus
+READERS = {
+    "pdf": "read_pdf",
+    "docx": "read_docx",
+    "eml": "read_eml",
+    "xlsx": "read_excel",
+    "scanned_pdf": "perform_ocr",
+}
+
+
+def percentile(sorted_values, p):
+    """Percentile par rang le plus proche"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _measure(kind, path, repeat):
+    """Exécuté dans un processus neuf : lit le document repeat fois"""
+    from utils import document_handler
+    from utils.ocr_engine import ocr_engine
+
+    reader = getattr(document_handler, READERS[kind])
+    baseline_rss = _peak_rss_mb()
+    durations = []
+    chars = 0
+    # Première lecture non mesurée : chargement différé des dépendances (PyMuPDF, openpyxl...)
+    reader(path)
+    for _ in range(repeat):
+        if kind == "scanned_pdf":
+            ocr_engine.invalidate(path)
+        start = time.perf_counter()
+        chars = len(reader(path))
+        durations.append(time.perf_counter() - start)
+    return durations, chars, baseline_rss, _peak_rss_mb()
+
+def run_case(context, kind, path, repeat):
+    with context.Pool(1) as pool:
+        durations, chars, baseline_rss, peak_rss = pool.apply(_measure, (kind, path, repeat))
+
+    durations.sort()
+    total = sum(durations)
+    return {
+        "reader": READERS[kind],
+        "kind": kind,
+        "file_size_kb": round(os.path.getsize(path) / 1024, 1),
+        "chars": chars,
+        "runs": len(durations),
+        "p50_ms": round(percentile(durations, 50) * 1000, 1),
+        "p90_ms": round(percentile(durations, 90) * 1000, 1),
+        "p99_ms": round(percentile(durations, 99) * 1000, 1),
+        "chars_per_second": round(chars * len(durations) / total) if total else None,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss
+    }
+
+def run_benchmark(sizes, repeat, kinds, corpus_dir):
+    if "scanned_pdf" in kinds and not shutil.which("tesseract"):
+        print("⚠️ Tesseract introuvable : perform_ocr ignoré")
+        kinds = [kind for kind in kinds if kind != "scanned_pdf"]
+
+    # Le processus de mesure hérite de cet environnement
+    os.environ["EXTRACTION_POOL_ENABLED"] = "false"
+    os.environ["CACHE_DIR"] = os.path.join(corpus_dir, "cache")
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    print(f"📊 Benchmark d'extraction : tailles {sizes}, {repeat} lectures par document")
+    print(f"   {'lecteur':12s} {'taille':>7s} {'fichier':>10s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'car/s':>11s} {'pic RSS':>9s}")
+    for kind in kinds:
+        for size in sizes:
+            path = generate(kind, corpus_dir, size)
+            result = run_case(context, kind, path, repeat)
+            result["size"] = size
+            results.append(result)
+            print(f"   {result['reader']:12s} {size:7d} {result['file_size_kb']:8.0f}Ko "
+                  f"{result['p50_ms']:7.1f}ms {result['p90_ms']:7.1f}ms {result['p99_ms']:7.1f}ms "
+                  f"{result['chars_per_second'] or 0:11d} {result['peak_rss_mb'] or 0:7.1f}Mo")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des lecteurs d'extraction")
+    parser.add_argument("--sizes", default="10,100", help="Tailles de documents (pages, paragraphes, lignes...)")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de lectures par document")
+    parser.add_argument("--readers", default=",".join(GENERATORS), help="Types de documents à mesurer")
+    parser.add_argument("--corpus-dir", help="Répertoire du corpus (conservé entre deux exécutions)")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="docusense_corpus_")
+    os.makedirs(corpus_dir, exist_ok=True)
+    try:
+        results = run_benchmark([int(size) for size in args.sizes.split(",")], args.repeat,
+                                args.readers.split(","), corpus_dir)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            print(f"💾 Résultats enregistrés dans {args.output}")
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Générateur de corpus synthétiques pour les benchmarks d'extraction
+
+Chaque générateur produit un fichier reproductible (graine fixe) dont la taille
+est pilotée par un seul paramètre : pages, paragraphes, lignes...
+
+Usage : python benchmarks/corpus.py <répertoire> [taille]
+"""
+
+import os
+import sys
+import random
+from email.message import EmailMessage
+
+WORDS = (
+    "contrat facture montant client fournisseur échéance paiement livraison article "
+    "conditions générales société adresse référence commande total remise garantie "
+    "résiliation avenant signature annexe durée période tarif taxe règlement"
+).split()
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def _paragraph(rng, sentences=4):
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def create_pdf(path, pages, seed=0):
+    """PDF avec une couche texte de quelques paragraphes par page"""
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        text = f"Page {page_number + 1}\n\n" + "\n\n".join(_paragraph(rng) for _ in range(6))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 790), text, fontsize=10)
+    doc.save(path)
+    doc.close()
+
+def create_scanned_pdf(path, pages, seed=0, dpi=150):
+    """PDF sans couche texte : chaque page est une image du texte (à OCRiser)"""
+    import fitz
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    for page_number in range(pages):
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        y = dpi // 2
+        for line in [f"Page {page_number + 1}"] + [_sentence(rng, 8) for _ in range(30)]:
+            draw.text((dpi // 2, y), line, fill=0)
+            y += dpi // 4
+        tmp_path = f"{path}.page.png"
+        image.save(tmp_path)
+        page = doc.new_page()
+        page.insert_image(page.rect, filename=tmp_path)
+        os.remove(tmp_path)
+    doc.save(path)
+    doc.close()
+
+def create_docx(path, paragraphs, seed=0):
+    """Rapport avec en-tête, paragraphes et un tableau de montants toutes les 50 lignes"""
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Rapport généré - Confidentiel"
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Paragraphe {i} : {_sentence(rng)}")
+        if i % 50 == 0:
+            table = doc.add_table(rows=3, cols=3)
+            for row_index, row in enumerate(table.rows):
+                for col_index, cell in enumerate(row.cells):
+                    cell.text = f"Montant {i}-{row_index}-{col_index} : {rng.randint(10, 99999)} EUR"
+    doc.save(path)
+
+def create_eml(path, paragraphs, seed=0, attachments=2):
+    """Email multipart : texte, alternative HTML et pièces jointes"""
+    rng = random.Random(seed)
+    body = "\n\n".join(_paragraph(rng) for _ in range(paragraphs))
+
+    message = EmailMessage()
+    message["Subject"] = f"Relance facture {rng.randint(1000, 9999)}"
+    message["From"] = "comptabilite@example.com"
+    message["To"] = "client@example.com"
+    message.set_content(body)
+    message.add_alternative("<html><body>" + "".join(f"<p>{p}</p>" for p in body.split("\n\n")) + "</body></html>",
+                            subtype="html")
+    for index in range(attachments):
+        message.add_attachment(rng.randbytes(64 * 1024), maintype="application", subtype="octet-stream",
+                               filename=f"annexe_{index}.bin")
+    with open(path, "wb") as f:
+        f.write(bytes(message))
+
+def create_xlsx(path, rows, seed=0, columns=40):
+    """Classeur large : une ligne d'en-tête puis rows lignes de columns colonnes"""
+    import openpyxl
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Données")
+    sheet.append([f"Colonne {c}" for c in range(columns)])
+    for row in range(rows):
+        sheet.append([row] + [rng.choice(WORDS) if c % 3 else rng.randint(0, 10 ** 6) for c in range(1, columns)])
+    workbook.save(path)
+
+
+# Générateurs par type de document : (extension, fonction)
+GENERATORS = {
+    "pdf": ("pdf", create_pdf),
+    "scanned_pdf": ("pdf", create_scanned_pdf),
+    "docx": ("docx", create_docx),
+    "eml": ("eml", create_eml),
+    "xlsx": ("xlsx", create_xlsx),
+}
+
+
+def generate(kind, directory, size, seed=0):
+    """Crée (ou réutilise) le document de ce type et de cette taille, retourne son chemin"""
+    ext, generator = GENERATORS[kind]
+    path = os.path.join(directory, f"{kind}_{size}_{seed}.{ext}")
+    if not os.path.exists(path):
+        generator(path, size, seed=seed)
+    return path
+
+def generate_corpus(directory, size, kinds=None, seed=0):
+    """Crée un document de chaque type dans le répertoire"""
+    os.makedirs(directory, exist_ok=True)
+    return {kind: generate(kind, directory, size, seed) for kind in (kinds or GENERATORS)}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage : python benchmarks/corpus.py <répertoire> [taille]")
+        sys.exit(1)
+    for kind, path in generate_corpus(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10).items():
+        print(f"📄 {kind:12s} {os.path.getsize(path) / 1024:9.0f} Ko  {path}")
@@ -7,6 +7,15 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))  # backend/
 
 class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+
+    # Client OpenAI : délais (s), nouvelles tentatives et pool de connexions keep-alive
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+    OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "0"))  # Tentatives du SDK, en plus de celles du répartiteur
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
     POPPLER_PATH = os.getenv("POPPLER_PATH")
 
     # Dossier des fichiers analysés
@@ -17,6 +26,8 @@ class Config:
 
     # Fichier JSON listant les métadonnées des prompts
     PROMPTS_JSON = os.path.join(PROMPT_CONTENT_DIR, "prompts_list.json")
+    # Délai minimal (s) entre deux vérifications des dates de modification des prompts
+    PROMPTS_RELOAD_INTERVAL = float(os.getenv("PROMPTS_RELOAD_INTERVAL", "1"))
 
     ALLOWED_EXTENSIONS = {"pdf", "png", "jpg", "jpeg", "doc", "docx", "eml"}
     
@@ -34,5 +45,105 @@ class Config:
     
     # Fichier de métadonnées pour le suivi des fichiers
     FILE_REGISTRY = os.path.join(FILE_MANAGEMENT_BASE, "file_registry.json")
+
+    # Dossier racine des caches persistants
+    CACHE_DIR = os.path.join(BASE_DIR, os.getenv("CACHE_DIR", "cache"))
+
+    # Cache du texte extrait (clé : hash SHA256 du fichier + version de l'extracteur)
+    TEXT_CACHE_DIR = os.path.join(CACHE_DIR, "extracted_text")
+    TEXT_CACHE_MAX_BYTES = int(os.getenv("TEXT_CACHE_MAX_MB", "512")) * 1024 * 1024
+    # Nombre de hash de fichiers gardés en mémoire (chemin, taille, date de modification)
+    FILE_HASH_CACHE_SIZE = int(os.getenv("FILE_HASH_CACHE_SIZE", "10000"))
+
+    # À incrémenter à chaque changement de la logique d'extraction pour invalider le cache
+    EXTRACTOR_VERSION = "4"
+
+    # Nombre maximal de lignes lues dans un classeur Excel (0 = pas de limite)
+    EXCEL_MAX_ROWS = int(os.getenv("EXCEL_MAX_ROWS", "0"))
+
+    # Pool de processus isolés pour l'extraction et l'OCR
+    EXTRACTION_POOL_ENABLED = os.getenv("EXTRACTION_POOL_ENABLED", "true").lower() == "true"
+    EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "0")) or None  # 0 = nombre de CPU
+    EXTRACTION_MAX_TASKS_PER_WORKER = int(os.getenv("EXTRACTION_MAX_TASKS_PER_WORKER", "50"))
+    EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024"))  # 0 = pas de limite
+    EXTRACTION_TASK_TIMEOUT = float(os.getenv("EXTRACTION_TASK_TIMEOUT", "120"))
+
+    # Analyse des documents longs par morceaux (map-reduce)
+    CHUNKED_ANALYSIS_CONCURRENCY = int(os.getenv("CHUNKED_ANALYSIS_CONCURRENCY", "4"))
+    CHUNKED_ANALYSIS_MAX_CHARS = int(os.getenv("CHUNKED_ANALYSIS_MAX_CHARS", "200000"))  # Texte lu au maximum
+    CHUNK_CACHE_DIR = os.path.join(CACHE_DIR, "analysis_chunks")
+    CHUNK_CACHE_MAX_BYTES = int(os.getenv("CHUNK_CACHE_MAX_MB", "64")) * 1024 * 1024
+    CHUNK_CACHE_TTL = int(os.getenv("CHUNK_CACHE_TTL_HOURS", "168")) * 3600
+
+    # IA locale (Ollama) : vérification de disponibilité en arrière-plan
+    OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    OLLAMA_PROBE_TIMEOUT = float(os.getenv("OLLAMA_PROBE_TIMEOUT", "2"))
+    OLLAMA_HEALTH_TTL = float(os.getenv("OLLAMA_HEALTH_TTL", "15"))  # Intervalle entre deux vérifications (s)
+    OLLAMA_HEALTH_MAX_BACKOFF = float(os.getenv("OLLAMA_HEALTH_MAX_BACKOFF", "300"))  # Intervalle maximal si Ollama est arrêté
+    # Client Ollama : connexions keep-alive partagées et délais de connexion / de lecture (s)
+    OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+    OLLAMA_PULL_TIMEOUT = float(os.getenv("OLLAMA_PULL_TIMEOUT", "300"))
+    # Modèle local : durée de maintien en mémoire après un appel (format Ollama, ex. "30m", "-1" = toujours)
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    if OLLAMA_KEEP_ALIVE.lstrip("-").isdigit():
+        OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)  # Ollama n'accepte un nombre de secondes que sous forme d'entier
+    OLLAMA_REWARM = os.getenv("OLLAMA_REWARM", "true").lower() == "true"  # Recharger le modèle déchargé
+    OLLAMA_WARMUP_CHECK_INTERVAL = float(os.getenv("OLLAMA_WARMUP_CHECK_INTERVAL", "60"))
+    OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))  # Fenêtre de contexte demandée à Ollama (jetons)
+
+    # Répartiteur des appels à l'IA : appels simultanés et limites par minute (0 = pas de limite)
+    LLM_OPENAI_MAX_CONCURRENCY = int(os.getenv("LLM_OPENAI_MAX_CONCURRENCY", "4"))
+    LLM_OPENAI_RPM = int(os.getenv("LLM_OPENAI_RPM", "60"))
+    LLM_OPENAI_TPM = int(os.getenv("LLM_OPENAI_TPM", "80000"))
+    LLM_LOCAL_MAX_CONCURRENCY = int(os.getenv("LLM_LOCAL_MAX_CONCURRENCY", "1"))
+    LLM_LOCAL_RPM = int(os.getenv("LLM_LOCAL_RPM", "0"))
+    LLM_LOCAL_TPM = int(os.getenv("LLM_LOCAL_TPM", "0"))
+    # Nouvelles tentatives sur 429 / 5xx / erreur de connexion, délais en secondes
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "60"))
+
+    # Routage entre fournisseurs : secondaire en cas d'échec ou de lenteur (vide = aucun)
+    LLM_ROUTER_OPENAI_SECONDARY = os.getenv("LLM_ROUTER_OPENAI_SECONDARY", "local")
+    LLM_ROUTER_LOCAL_SECONDARY = os.getenv("LLM_ROUTER_LOCAL_SECONDARY", "")  # Les documents restent sur la machine
+    LLM_HEDGE_LATENCY_BUDGET = float(os.getenv("LLM_HEDGE_LATENCY_BUDGET", "45"))  # Délai (s) avant couverture, 0 = jamais
+    LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    LLM_CIRCUIT_RESET_TIMEOUT = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "60"))
+    # Prix des modèles en $ par million de jetons, en complément des prix connus : {"modèle": [entrée, sortie]}
+    LLM_MODEL_PRICES = os.getenv("LLM_MODEL_PRICES", "")
+
+    # Budget de jetons des prompts : part de la fenêtre de contexte remplie et réserve pour la réponse
+    LLM_CONTEXT_TARGET_FRACTION = float(os.getenv("LLM_CONTEXT_TARGET_FRACTION", "0.75"))
+    LLM_OUTPUT_RESERVE_TOKENS = int(os.getenv("LLM_OUTPUT_RESERVE_TOKENS", "1024"))
+    LLM_MAX_INPUT_TOKENS = int(os.getenv("LLM_MAX_INPUT_TOKENS", "32000"))  # Plafond par appel (coût), 0 = aucun
+    LLM_DEFAULT_CONTEXT_WINDOW = int(os.getenv("LLM_DEFAULT_CONTEXT_WINDOW", "8192"))  # Modèle inconnu
+    LLM_READ_CHARS_PER_TOKEN = 5  # Caractères lus par jeton de budget (avec marge), avant la coupe exacte
+
+    # Cache des réponses de l'IA
+    LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm_responses")
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "128")) * 1024 * 1024
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL_HOURS", "720")) * 3600
+
+    # Jobs d'extraction en masse
+    BULK_EXTRACTION_MAX_WORKERS = int(os.getenv("BULK_EXTRACTION_MAX_WORKERS", "0")) or None  # 0 = taille du pool d'extraction
+    BULK_EXTRACTION_MAX_JOBS = int(os.getenv("BULK_EXTRACTION_MAX_JOBS", "20"))  # Jobs conservés en mémoire
+
+    # OCR (Tesseract) : langue, résolution de rendu et parallélisme
+    OCR_LANG = os.getenv("OCR_LANG", "fra")
+    OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+    OCR_WINDOW_SIZE = int(os.getenv("OCR_WINDOW_SIZE", "2"))  # Pages rendues par tâche
+    OCR_MAX_PAGES_IN_FLIGHT = int(os.getenv("OCR_MAX_PAGES_IN_FLIGHT", "0")) or None  # 0 = workers x fenêtre
+    OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60")) or None  # Délai de pdftoppm/Tesseract, 0 = aucun
+
+    # Détection des pages scannées : en dessous de ce nombre de caractères, une page
+    # dont les images couvrent au moins cette fraction de la surface passe par l'OCR
+    OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "30"))
+    OCR_MIN_IMAGE_COVERAGE = float(os.getenv("OCR_MIN_IMAGE_COVERAGE", "0.5"))
+
+    # Cache du texte OCR par page (clé : hash du document + page + réglages OCR)
+    OCR_CACHE_DIR = os.path.join(CACHE_DIR, "ocr_pages")
+    OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_MB", "256")) * 1024 * 1024
     
     
@@ -1,13 +1,45 @@
 import os
+import json
 import datetime
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-
-from utils.document_handler import load_prompts_metadata, read_file, process_document, process_multiple_documents
-from utils.logging_config import setup_logging
-from utils.local_ai import local_ai
-from utils.file_manager import file_manager as old_file_manager
-from utils.unified_file_manager import unified_file_manager
+from utils.startup_report import startup_report
+
+# Chaque bloc d'import est chronométré pour le rapport de démarrage (/api/startup-report)
+with startup_report.measure("flask"):
+    from flask import Flask, Response, request, jsonify, stream_with_context
+    from flask_cors import CORS
+
+with startup_report.measure("utils.document_handler"):
+    from utils.document_handler import read_preview, process_document, process_multiple_documents, stream_document, extracted_text_cache
+with startup_report.measure("utils.logging_config"):
+    from utils.logging_config import setup_logging
+with startup_report.measure("utils.local_ai"):
+    from utils.local_ai import local_ai
+with startup_report.measure("utils.model_lifecycle"):
+    from utils.model_lifecycle import model_lifecycle
+with startup_report.measure("utils.ocr_engine"):
+    from utils.ocr_engine import ocr_engine
+with startup_report.measure("utils.extraction_pool"):
+    from utils.extraction_pool import extraction_pool
+with startup_report.measure("utils.bulk_extraction"):
+    from utils.bulk_extraction import bulk_extraction_manager
+with startup_report.measure("utils.prompt_registry"):
+    from utils.prompt_registry import prompt_registry
+with startup_report.measure("utils.chunked_analysis"):
+    from utils.chunked_analysis import chunk_cache
+with startup_report.measure("utils.llm_cache"):
+    from utils.llm_cache import llm_response_cache
+with startup_report.measure("utils.llm_dispatcher"):
+    from utils.llm_dispatcher import llm_dispatcher
+with startup_report.measure("utils.provider_router"):
+    from utils.provider_router import provider_router
+with startup_report.measure("utils.model_routing"):
+    from utils.model_routing import route_stats
+with startup_report.measure("utils.token_budget"):
+    from utils.token_budget import token_budget
+with startup_report.measure("utils.file_manager"):
+    from utils.file_manager import file_manager
+with startup_report.measure("utils.unified_file_manager"):
+    from utils.unified_file_manager import unified_file_manager
 from config import Config
 
 app = Flask(__name__)
@@ -21,6 +53,12 @@ logger = setup_logging()
 # Stockage global de la file d'analyse
 analysis_queue = []
 
+# Nombre de caractères du document utilisés pour générer un prompt contextuel
+CONTEXTUAL_PROMPT_MAX_CHARS = 2000
+
+# Nombre de caractères affichés dans l'aperçu d'un fichier analysé
+TEXT_PREVIEW_MAX_CHARS = 500
+
 @app.route("/api/health", methods=["GET"])
 def health_check():
     """Route de vérification de santé du backend"""
@@ -30,23 +68,133 @@ def health_check():
 def ai_status():
     """Route pour vérifier le statut des IA disponibles"""
     openai_available = bool(Config.OPENAI_API_KEY)
-    local_ai_available = local_ai.is_available()
     
     return jsonify({
         "openai": {
             "available": openai_available,
             "configured": bool(Config.OPENAI_API_KEY)
         },
-        "local": {
-            "available": local_ai_available,
-            "models": local_ai.get_available_models() if local_ai_available else []
-        }
+        # Statut en cache, rafraîchi en arrière-plan par local_ai
+        "local": {**local_ai.get_health(), "model_lifecycle": model_lifecycle.get_stats()}
+    })
+
+@app.route("/api/local-ai/pulls", methods=["POST"])
+def start_model_pull():
+    """Lance le téléchargement d'un modèle Ollama en arrière-plan"""
+    data = request.get_json(silent=True) or {}
+    if not local_ai.is_available():
+        return jsonify({"success": False, "error": "IA locale non disponible"}), 503
+    return jsonify({"success": True, "pull": local_ai.start_model_pull(data.get('model'))}), 202
+
+@app.route("/api/local-ai/pulls", methods=["GET"])
+def get_model_pulls():
+    """Progression des téléchargements de modèles ; ?model= pour un seul modèle"""
+    model_name = request.args.get('model')
+    if not model_name:
+        return jsonify({"success": True, "pulls": local_ai.pulls.list_pulls()})
+    pull = local_ai.get_pull_status(model_name)
+    if not pull:
+        return jsonify({"success": False, "error": "Aucun téléchargement pour ce modèle"}), 404
+    return jsonify({"success": True, "pull": pull})
+
+@app.route("/api/startup-report", methods=["GET"])
+def get_startup_report():
+    """Route pour consulter le coût d'import des modules au démarrage"""
+    return jsonify({
+        "success": True,
+        "report": startup_report.get_report()
+    })
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    """Route pour consulter les statistiques des caches"""
+    return jsonify({
+        "success": True,
+        "extracted_text": extracted_text_cache.get_stats(),
+        "ocr_pages": ocr_engine.cache.get_stats(),
+        "analysis_chunks": chunk_cache.get_stats(),
+        "llm_responses": llm_response_cache.get_stats()
     })
 
+@app.route("/api/extraction-pool/stats", methods=["GET"])
+def extraction_pool_stats():
+    """Route pour consulter l'état du pool d'extraction (tâches, délais dépassés, recyclages)"""
+    return jsonify({"success": True, "stats": extraction_pool.get_stats()})
+
+@app.route("/api/llm/stats", methods=["GET"])
+def llm_dispatcher_stats():
+    """Route pour consulter le répartiteur des appels à l'IA (file d'attente, temps de service, 429)
+    et les jetons d'entrée estimés comparés à ceux facturés"""
+    return jsonify({"success": True, "providers": llm_dispatcher.get_stats(), "token_usage": token_budget.get_stats()})
+
+@app.route("/api/llm/routing", methods=["GET"])
+def llm_routing_stats():
+    """Route pour consulter le routage entre fournisseurs (disjoncteurs, couvertures) et par modèle (latence, coût)"""
+    return jsonify({"success": True, "routing": provider_router.get_stats(), "routes": route_stats.get_stats()})
+
+@app.route("/api/extraction-jobs", methods=["POST"])
+def start_extraction_job():
+    """Lance l'extraction en masse d'un répertoire ou d'une liste de fichiers vers le cache"""
+    data = request.get_json()
+    if not data or not (data.get('directory_path') or data.get('paths')):
+        return jsonify({"success": False, "error": "Répertoire ou liste de fichiers manquant"}), 400
+
+    directory_path = data.get('directory_path')
+    if directory_path and not isinstance(directory_path, str):
+        return jsonify({"success": False, "error": "directory_path doit être une chaîne"}), 400
+    if directory_path and not os.path.isdir(directory_path):
+        return jsonify({"success": False, "error": "Répertoire introuvable"}), 404
+
+    paths = data.get('paths')
+    if paths is not None and not (isinstance(paths, list) and all(isinstance(path, str) for path in paths)):
+        return jsonify({"success": False, "error": "paths doit être une liste de chemins"}), 400
+
+    max_workers = data.get('max_workers')
+    if max_workers is not None and (isinstance(max_workers, bool) or not isinstance(max_workers, int)):
+        return jsonify({"success": False, "error": "max_workers doit être un entier"}), 400
+
+    try:
+        job = bulk_extraction_manager.start_job(
+            directory_path=directory_path,
+            paths=paths,
+            recursive=bool(data.get('recursive', True)),
+            max_workers=max_workers
+        )
+        return jsonify({"success": True, "job": job.get_summary()}), 202
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route("/api/extraction-jobs", methods=["GET"])
+def list_extraction_jobs():
+    """Liste les jobs d'extraction récents"""
+    return jsonify({"success": True, "jobs": bulk_extraction_manager.list_jobs()})
+
+@app.route("/api/extraction-jobs/<job_id>", methods=["GET"])
+def get_extraction_job(job_id):
+    """Progression et débit d'un job ; ?include_files=true ajoute les durées par fichier"""
+    job = bulk_extraction_manager.get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job introuvable"}), 404
+
+    response = {"success": True, "job": job.get_summary()}
+    if request.args.get('include_files', 'false').lower() == 'true':
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', 100, type=int)
+        response["files"] = job.get_results(offset, limit)
+    return jsonify(response)
+
+@app.route("/api/extraction-jobs/<job_id>/cancel", methods=["POST"])
+def cancel_extraction_job(job_id):
+    """Arrête un job après les fichiers en cours d'extraction"""
+    job = bulk_extraction_manager.get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job introuvable"}), 404
+    job.cancel()
+    return jsonify({"success": True, "job": job.get_summary()})
+
 @app.route("/api/prompts", methods=["GET"])
 def get_prompts():
-    prompts = load_prompts_metadata(app.config['PROMPTS_JSON'])
-    return jsonify(prompts)
+    return jsonify(prompt_registry.list_prompts())
 
 # Nouvelles routes pour la gestion des fichiers par état
 @app.route("/api/file-management/register", methods=["POST"])
@@ -232,6 +380,38 @@ def get_file_metadata():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def start_file_analysis(file_path, prompt_id, overwrite):
+    """Enregistre le fichier dans le registre et le marque en cours d'analyse.
+
+    Retourne (file_id, prompt_id, None) ou (file_id, prompt_id, réponse d'erreur).
+    """
+    # Enregistrer le fichier s'il ne l'est pas déjà
+    file_id = file_manager.registry.find_file_by_path(file_path)
+    if not file_id:
+        file_id = file_manager.add_file(file_path, file_path)
+    
+    # S'assurer que file_id n'est pas None
+    if not file_id:
+        return None, prompt_id, (jsonify({"success": False, "error": "Impossible d'enregistrer le fichier"}), 500)
+    
+    # Vérifier si le fichier a déjà été analysé et si on ne veut pas écraser
+    if not overwrite:
+        file_info = file_manager.registry.get_file_info(file_id)
+        if file_info and file_info.get("status") == "completed":
+            return file_id, prompt_id, (jsonify({"success": False, "error": "Fichier déjà analysé"}), 409)
+    
+    # Marquer comme en cours d'analyse
+    file_manager.start_analysis(file_id)
+    
+    # Utiliser le prompt spécifié ou le premier par défaut
+    if not prompt_id:
+        prompt_id = prompt_registry.default_prompt_id()
+    if not prompt_id:
+        file_manager.mark_as_failed(file_id, "Aucun prompt disponible")
+        return file_id, prompt_id, (jsonify({"success": False, "error": "Aucun prompt disponible"}), 500)
+    
+    return file_id, prompt_id, None
+
 @app.route("/api/analyze", methods=["POST"])
 def analyze_file():
     """Analyse un fichier avec l'IA"""
@@ -243,51 +423,37 @@ def analyze_file():
     ia_mode = data.get('ia_mode', 'openai')
     prompt_id = data.get('prompt_id')
     overwrite = data.get('overwrite', False)
+    use_ocr = data.get('use_ocr', False)
+    chunked = data.get('chunked', False)
+    bypass_cache = data.get('bypass_cache', False)
     
     if not os.path.exists(file_path):
         return jsonify({"success": False, "error": "Fichier introuvable"}), 404
     
     try:
-        # Enregistrer le fichier s'il ne l'est pas déjà
-        file_id = file_manager.registry.find_file_by_path(file_path)
-        if not file_id:
-            file_id = file_manager.add_file(file_path, file_path)
-        
-        # S'assurer que file_id n'est pas None
-        if not file_id:
-            return jsonify({"success": False, "error": "Impossible d'enregistrer le fichier"}), 500
-        
-        # Vérifier si le fichier a déjà été analysé et si on ne veut pas écraser
-        if not overwrite:
-            file_info = file_manager.registry.get_file_info(file_id)
-            if file_info and file_info.get("status") == "completed":
-                return jsonify({"success": False, "error": "Fichier déjà analysé"}), 409
-        
-        # Marquer comme en cours d'analyse
-        file_manager.start_analysis(file_id)
-        
-        # Charger les prompts
-        prompts = load_prompts_metadata(app.config['PROMPTS_JSON'])
-        if not prompts:
-            if file_id:
-                file_manager.mark_as_failed(file_id, "Aucun prompt disponible")
-            return jsonify({"success": False, "error": "Aucun prompt disponible"}), 500
-        
-        # Utiliser le prompt spécifié ou le premier par défaut
-        if not prompt_id:
-            prompt_id = prompts[0]['id']
+        file_id, prompt_id, error_response = start_file_analysis(file_path, prompt_id, overwrite)
+        if error_response:
+            return error_response
         
         # Traiter le document
-        result = process_document(file_path, prompt_id, ia_mode)
+        result = process_document(file_path, prompt_id, ia_mode, use_ocr, chunked, use_cache=not bypass_cache)
+        
+        if result.get('confirmation_required'):
+            # Pages scannées : l'utilisateur doit autoriser l'OCR avant de relancer l'analyse
+            file_manager.mark_as_failed(file_id, result.get('message'))
+            return jsonify(result)
         
         if result.get('success'):
             analysis = result.get('analysis', 'Analyse terminée')
-            file_manager.complete_analysis(file_id, analysis)
+            file_manager.complete_analysis(file_id, analysis, result.get('provider'))
             
             return jsonify({
                 "success": True,
                 "data": analysis,
                 "ia_mode": result.get('ia_mode', ia_mode),
+                "provider": result.get('provider'),
+                "model": result.get('model'),
+                "warning": result.get('warning'),
                 "file_id": file_id
             })
         else:
@@ -301,6 +467,64 @@ def analyze_file():
             file_manager.mark_as_failed(file_id, str(e))
         return jsonify({"success": False, "error": str(e)}), 500
 
+def sse_event(event, data):
+    """Formate un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route("/api/analyze/stream", methods=["POST"])
+def analyze_file_stream():
+    """Analyse un fichier en envoyant la réponse de l'IA au fil de l'eau (Server-Sent Events).
+
+    Événements : start, token (morceau de réponse), puis done, confirmation_required ou error.
+    Le résultat final est enregistré dans le registre comme avec /api/analyze.
+    """
+    data = request.get_json()
+    if not data or 'file_path' not in data:
+        return jsonify({"success": False, "error": "Chemin du fichier manquant"}), 400
+    
+    file_path = data['file_path']
+    ia_mode = data.get('ia_mode', 'openai')
+    use_ocr = data.get('use_ocr', False)
+    bypass_cache = data.get('bypass_cache', False)
+    
+    if not os.path.exists(file_path):
+        return jsonify({"success": False, "error": "Fichier introuvable"}), 404
+    
+    try:
+        file_id, prompt_id, error_response = start_file_analysis(file_path, data.get('prompt_id'), data.get('overwrite', False))
+        if error_response:
+            return error_response
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    
+    def generate():
+        finished = False
+        try:
+            yield sse_event("start", {"file_id": file_id, "prompt_id": prompt_id, "ia_mode": ia_mode})
+            for event, payload in stream_document(file_path, prompt_id, ia_mode, use_ocr, use_cache=not bypass_cache):
+                if event == "done":
+                    file_manager.complete_analysis(file_id, payload["analysis"], payload.get("provider"))
+                    payload = {**payload, "file_id": file_id, "ia_mode": ia_mode}
+                    finished = True
+                elif event in ("confirmation_required", "error"):
+                    file_manager.mark_as_failed(file_id, payload.get("message") or payload.get("error"))
+                    finished = True
+                yield sse_event(event, payload)
+        except Exception as e:
+            file_manager.mark_as_failed(file_id, str(e))
+            finished = True
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            # Client déconnecté avant la fin de la réponse
+            if not finished:
+                file_manager.mark_as_failed(file_id, "Analyse interrompue")
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.route("/api/analyze-multi", methods=["POST"])
 def analyze_multiple_files():
     """Analyse plusieurs fichiers avec un prompt spécifique"""
@@ -311,6 +535,8 @@ def analyze_multiple_files():
     file_paths = data.get('file_paths', [])
     prompt_id = data.get('prompt_id')
     ia_mode = data.get('ia_mode', 'openai')
+    use_ocr = data.get('use_ocr', False)
+    bypass_cache = data.get('bypass_cache', False)
     
     if not file_paths:
         return jsonify({"success": False, "error": "Aucun fichier fourni"}), 400
@@ -319,9 +545,7 @@ def analyze_multiple_files():
         return jsonify({"success": False, "error": "ID du prompt manquant"}), 400
     
     try:
-        # Charger les prompts
-        prompts = load_prompts_metadata(app.config['PROMPTS_JSON'])
-        prompt = next((p for p in prompts if p['id'] == prompt_id), None)
+        prompt = prompt_registry.get_metadata(prompt_id)
         
         if not prompt:
             return jsonify({"success": False, "error": "Prompt non trouvé"}), 404
@@ -333,10 +557,10 @@ def analyze_multiple_files():
         
         # Traiter les documents
         if prompt.get('multi_document', False):
-            result = process_multiple_documents(file_paths, prompt, ia_mode)
+            result = process_multiple_documents(file_paths, prompt_id, ia_mode, use_ocr, use_cache=not bypass_cache)
         else:
             # Pour les prompts mono-document, traiter le premier fichier
-            result = process_document(file_paths[0], prompt, ia_mode)
+            result = process_document(file_paths[0], prompt_id, ia_mode, use_ocr, use_cache=not bypass_cache)
         
         return jsonify({
             "success": True,
@@ -365,8 +589,8 @@ def contextual_prompt():
         return jsonify({"success": False, "error": "Fichier introuvable"}), 404
     
     try:
-        # Lire le contenu du fichier
-        file_content = read_file(file_path)
+        # Lire uniquement le début du fichier, seul exploité par le prompt contextuel
+        file_content = read_preview(file_path, CONTEXTUAL_PROMPT_MAX_CHARS)
         if not file_content:
             return jsonify({"success": False, "error": "Impossible de lire le contenu du fichier"}), 500
         
@@ -387,7 +611,7 @@ def contextual_prompt():
 def generate_contextual_prompt(content, prompt_type):
     """Génère un prompt contextuel basé sur le contenu et le type demandé"""
     # Limiter le contenu pour l'analyse
-    content_preview = content[:2000] if len(content) > 2000 else content
+    content_preview = content[:CONTEXTUAL_PROMPT_MAX_CHARS]
     
     base_prompts = {
         'general': f"Analyse ce document et fournis une synthèse générale :\n\n{content_preview}",
@@ -437,21 +661,19 @@ def get_analyzed_file_info(filename):
     if not os.path.isfile(fpath):
         return jsonify({"error": "Fichier introuvable"}), 404
     stat = os.stat(fpath)
-    # Lecture du texte du fichier
-    from utils.document_handler import read_file, analyse_document_with_text, load_prompts_metadata
+    # Lecture du début du fichier uniquement (un caractère de plus pour savoir s'il est tronqué)
     try:
-        text = read_file(fpath)
+        text = read_preview(fpath, TEXT_PREVIEW_MAX_CHARS + 1)
     except Exception as e:
         text = ""
     # Sélection du prompt par défaut (le premier du catalogue)
-    prompts = load_prompts_metadata(app.config['PROMPTS_JSON'])
-    prompt_id = prompts[0]['id'] if prompts else None
+    prompt_id = prompt_registry.default_prompt_id()
     
     return jsonify({
         "filename": filename,
         "size": stat.st_size,
         "modified": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
-        "text_preview": text[:500] + "..." if len(text) > 500 else text,
+        "text_preview": text[:TEXT_PREVIEW_MAX_CHARS] + "..." if len(text) > TEXT_PREVIEW_MAX_CHARS else text,
         "prompt_id": prompt_id
     })
 
@@ -660,5 +882,31 @@ def clear_analysis_queue():
     return jsonify({"success": True, "queue": analysis_queue})
 
 
+_background_started = False
+
+def start_background_services():
+    """Démarre les tâches de fond une seule fois, dans le processus qui sert l'API.
+
+    Elles ne sont pas lancées à l'import : les processus d'extraction (spawn)
+    réimportent ce module et ne doivent ni sonder Ollama ni précharger le modèle.
+    """
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    # Surveillance d'Ollama en arrière-plan : /api/ai-status ne fait que lire son état
+    local_ai.start_health_prober()
+    # Préchargement du modèle local, rechargé s'il est déchargé après une période d'inactivité
+    model_lifecycle.start()
+
+@app.before_request
+def ensure_background_services():
+    """Démarrage des tâches de fond lorsque l'application est servie par un serveur WSGI"""
+    start_background_services()
+
+startup_report.mark_ready()
+logger.info(f"Backend prêt en {startup_report.ready_after_ms} ms")
+
 if __name__ == "__main__":
+    start_background_services()
     app.run(host="0.0.0.0", port=5000, debug=True)
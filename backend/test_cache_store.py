@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le cache persistant du texte extrait
+"""
+
+import os
+import shutil
+import tempfile
+from utils.cache_store import PersistentLRUCache
+
+def test_hit_and_miss():
+    """Test des compteurs hit/miss"""
+    print("🧪 Test des hits et misses...")
+    cache_dir = tempfile.mkdtemp(prefix="docusense_cache_")
+    try:
+        cache = PersistentLRUCache(cache_dir, max_bytes=1024)
+        assert cache.get("abc:1") is None
+        cache.set("abc:1", "Contenu extrait")
+        assert cache.get("abc:1") == "Contenu extrait"
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        print(f"✅ Statistiques: {stats}")
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_lru_eviction():
+    """Test de l'éviction LRU bornée en taille"""
+    print("🧪 Test de l'éviction LRU...")
+    cache_dir = tempfile.mkdtemp(prefix="docusense_cache_")
+    try:
+        cache = PersistentLRUCache(cache_dir, max_bytes=25)
+        cache.set("a", "x" * 10)
+        cache.set("b", "y" * 10)
+        cache.get("a")  # "b" devient la moins récemment utilisée
+        cache.set("c", "z" * 10)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.get_stats()["size_bytes"] <= 25
+        print("✅ L'entrée la moins récemment utilisée a été évincée")
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_persistence():
+    """Test de la persistance entre deux instances"""
+    print("🧪 Test de la persistance...")
+    cache_dir = tempfile.mkdtemp(prefix="docusense_cache_")
+    try:
+        cache = PersistentLRUCache(cache_dir, max_bytes=1024)
+        cache.set("doc:1", "Texte persistant")
+        cache.flush()
+        reloaded = PersistentLRUCache(cache_dir, max_bytes=1024)
+        assert reloaded.get("doc:1") == "Texte persistant"
+        assert os.path.exists(reloaded.index_file)
+        print("✅ Le cache est rechargé depuis le disque")
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_recency_survives_restart():
+    """Test que l'ordre LRU des lectures est conservé après un redémarrage"""
+    print("🧪 Test de l'ordre LRU persistant...")
+    cache_dir = tempfile.mkdtemp(prefix="docusense_cache_")
+    try:
+        cache = PersistentLRUCache(cache_dir, max_bytes=25)
+        cache.set("a", "x" * 10)
+        cache.set("b", "y" * 10)
+        cache.flush()
+        cache.get("a")  # Lecture seule : "b" devient la moins récemment utilisée
+        cache.flush()
+
+        reloaded = PersistentLRUCache(cache_dir, max_bytes=25)
+        reloaded.set("c", "z" * 10)
+        assert reloaded.get("a") is not None
+        assert reloaded.get("b") is None
+        print("✅ L'entrée lue avant le redémarrage a été conservée")
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    test_hit_and_miss()
+    test_lru_eviction()
+    test_persistence()
+    test_recency_survives_restart()
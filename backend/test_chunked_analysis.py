@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Script de test pour l'analyse par morceaux
+"""
+
+import uuid
+from utils.chunked_analysis import ChunkedAnalysisError, UncachedResponse, analyze_chunked, split_text
+
+TEXT = "\n\n".join(f"Paragraphe {i} : " + "clause " * 20 for i in range(12))
+
+def test_split_respects_budget():
+    """Test du découpage sur les paragraphes dans la limite de taille"""
+    print("🧪 Test du découpage...")
+    chunks = split_text(TEXT, 400)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert "".join(chunks).count("Paragraphe") == 12
+    print(f"✅ {len(chunks)} morceaux")
+
+def test_failed_chunks_are_retried_from_cache():
+    """Test que seuls les morceaux en échec ou non cachables sont réanalysés"""
+    print("🧪 Test de la reprise après échec...")
+    namespace = f"test:{uuid.uuid4()}"
+    state = {"fail": True}
+    calls = []
+
+    def flaky(prompt):
+        calls.append(prompt)
+        if state["fail"] and "partie 2/" in prompt:
+            raise RuntimeError("Délai dépassé")
+        if "partie 3/" in prompt:
+            return UncachedResponse("analyse du secondaire")
+        return "analyse"
+
+    try:
+        analyze_chunked(TEXT, "Résume.", flaky, chunk_chars=400, namespace=namespace)
+        assert False, "ChunkedAnalysisError attendue"
+    except ChunkedAnalysisError as e:
+        print(f"✅ Échec partiel: {e}")
+
+    state["fail"] = False
+    first_run = len(calls)
+    result = analyze_chunked(TEXT, "Résume.", flaky, chunk_chars=400, namespace=namespace)
+    retried = sorted(prompt.split("(partie ")[1].split(")")[0] for prompt in calls[first_run:] if "(partie " in prompt)
+    assert [part.split("/")[0] for part in retried] == ["2", "3"]
+    assert result["chunks"] > 3 and result["reduce_calls"] >= 1
+    print(f"✅ Morceaux réanalysés: {retried} sur {result['chunks']}")
+
+if __name__ == "__main__":
+    test_split_respects_budget()
+    test_failed_chunks_are_retried_from_cache()
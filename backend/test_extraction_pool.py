@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le pool d'extraction isolé
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from utils.extraction_pool import ExtractionPool, ExtractionError
+
+def sleep_and_return(seconds):
+    time.sleep(seconds)
+    return seconds
+
+def crash_process():
+    os._exit(3)
+
+def spawn_child_and_wait(pid_file):
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    with open(pid_file, "w") as f:
+        f.write(str(child.pid))
+    time.sleep(60)
+
+def is_running(pid):
+    """Processus vivant (un zombie non récupéré compte comme arrêté)"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] not in ("Z", "X")
+    except OSError:
+        return False
+
+def test_timeout_and_crash_are_isolated():
+    """Test qu'une tâche bloquée ou qui plante n'affecte pas les suivantes"""
+    print("🧪 Test de l'isolation des tâches...")
+    pool = ExtractionPool(max_workers=1, task_timeout=1)
+    try:
+        for task in ((sleep_and_return, 5), (crash_process,)):
+            try:
+                pool.run(*task)
+                assert False, "ExtractionError attendue"
+            except ExtractionError as e:
+                print(f"✅ Échec isolé: {e}")
+
+        assert pool.run(sleep_and_return, 0) == 0
+        stats = pool.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["failed"] == 2
+        print(f"✅ Statistiques: {stats}")
+    finally:
+        pool.shutdown()
+
+def test_worker_recycling():
+    """Test du recyclage des processus après un nombre fixe de tâches"""
+    print("🧪 Test du recyclage des processus...")
+    pool = ExtractionPool(max_workers=1, max_tasks_per_worker=2)
+    try:
+        assert [pool.run(sleep_and_return, 0) for _ in range(5)] == [0] * 5
+        assert pool.get_stats()["recycled"] == 2
+        print("✅ Processus recyclés")
+    finally:
+        pool.shutdown()
+
+def test_timeout_kills_subprocesses():
+    """Test qu'aucun sous-processus d'une tâche ne survit au dépassement du délai"""
+    print("🧪 Test de l'arrêt des sous-processus...")
+    pool = ExtractionPool(max_workers=1, task_timeout=3)
+    pid_file = tempfile.mktemp(prefix="docusense_child_")
+    try:
+        try:
+            pool.run(spawn_child_and_wait, pid_file)
+            assert False, "ExtractionError attendue"
+        except ExtractionError:
+            pass
+        with open(pid_file, "r") as f:
+            child_pid = int(f.read())
+        deadline = time.monotonic() + 5
+        while is_running(child_pid) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not is_running(child_pid)
+        print(f"✅ Sous-processus {child_pid} arrêté")
+    finally:
+        pool.shutdown()
+        if os.path.exists(pid_file):
+            os.remove(pid_file)
+
+if __name__ == "__main__":
+    test_timeout_and_crash_are_isolated()
+    test_timeout_kills_subprocesses()
+    test_worker_recycling()
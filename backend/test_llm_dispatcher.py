@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le répartiteur des appels à l'IA
+"""
+
+import time
+import threading
+from utils.llm_dispatcher import LLMDispatcher, ProviderLimiter, RetryableError, TokenBucket
+
+def make_dispatcher(max_concurrency=1, rpm=0, max_retries=2):
+    limiter = ProviderLimiter("test", max_concurrency, rpm, 0)
+    return LLMDispatcher({"test": limiter}, max_retries=max_retries, base_delay=0.01, max_delay=0.5)
+
+def test_retry_honours_retry_after():
+    """Test des nouvelles tentatives sur erreur temporaire, avec le délai demandé"""
+    print("🧪 Test des nouvelles tentatives...")
+    dispatcher = make_dispatcher()
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 2:
+            raise RetryableError("Trop de requêtes", retry_after=0.2, status_code=429)
+        return "ok"
+
+    assert dispatcher.call("test", flaky) == "ok"
+    assert attempts[1] - attempts[0] >= 0.2
+    stats = dispatcher.get_stats()["test"]
+    assert stats["retries"] == 1 and stats["rate_limited"] == 1 and stats["errors"] == 0
+    print(f"✅ Statistiques: {stats}")
+
+def test_permanent_error_is_not_retried():
+    """Test qu'une erreur définitive est relevée immédiatement"""
+    print("🧪 Test des erreurs définitives...")
+    dispatcher = make_dispatcher()
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("Clé API invalide")
+
+    try:
+        dispatcher.call("test", broken)
+        assert False, "ValueError attendue"
+    except ValueError:
+        pass
+    assert len(calls) == 1
+    print("✅ Erreur relevée sans nouvelle tentative")
+
+def test_concurrency_limit_and_queue_time():
+    """Test de la limite d'appels simultanés et de la mesure du temps d'attente"""
+    print("🧪 Test de la limite d'appels simultanés...")
+    dispatcher = make_dispatcher(max_concurrency=1)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=dispatcher.call, args=("test", slow)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = dispatcher.get_stats()["test"]
+    assert peak[0] == 1
+    assert stats["queue"]["p95_ms"] >= 150
+    print(f"✅ Attente: {stats['queue']}, service: {stats['service']}")
+
+def test_large_request_is_charged_in_full():
+    """Test qu'une demande plus grande que le seau est débitée en entier"""
+    print("🧪 Test du débit en jetons...")
+    bucket = TokenBucket(6000, burst_seconds=0.1)  # 100 jetons/s, seau de 10
+    assert bucket.acquire(30) == 0
+    waited = bucket.acquire(1)
+    assert waited >= 0.2
+    print(f"✅ Appel suivant retardé de {waited:.2f} s")
+
+if __name__ == "__main__":
+    test_retry_honours_retry_after()
+    test_permanent_error_is_not_retried()
+    test_concurrency_limit_and_queue_time()
+    test_large_request_is_charged_in_full()
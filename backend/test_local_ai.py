@@ -10,12 +10,13 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.local_ai import local_ai
 from utils.document_handler import process_document
 import tempfile
+import time
 
 def test_ollama_connection():
     """Test de la connexion à Ollama"""
     print("🔍 Test de connexion à Ollama...")
     
-    if local_ai.is_available():
+    if local_ai.is_available(refresh=True):
         print("✅ Ollama est disponible")
         models = local_ai.get_available_models()
         print(f"📋 Modèles disponibles: {models}")
@@ -30,12 +31,17 @@ def test_model_download():
     """Test du téléchargement du modèle"""
     print("\n📥 Test du téléchargement du modèle...")
     
-    if local_ai.ensure_model_available("llama3.1:8b"):
-        print("✅ Modèle Llama 3.1 8B disponible")
-        return True
-    else:
-        print("❌ Impossible de télécharger le modèle")
-        return False
+    # Le téléchargement se fait en arrière-plan : on suit sa progression
+    while not local_ai.ensure_model_available("llama3.1:8b"):
+        pull = local_ai.get_pull_status("llama3.1:8b")
+        if not pull or pull["status"] == "failed":
+            print("❌ Impossible de télécharger le modèle")
+            return False
+        print(f"⏳ {pull['step']} ({pull['percent']:.0f} %)")
+        time.sleep(5)
+
+    print("✅ Modèle Llama 3.1 8B disponible")
+    return True
 
 def test_analysis():
     """Test d'analyse de document"""
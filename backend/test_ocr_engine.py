@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le cache des pages OCR
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+
+from utils.cache_store import PersistentLRUCache
+from utils.ocr_engine import OCREngine
+
+class FakeExecutor:
+    """Remplace le pool d'extraction : chaque page « OCRisée » vaut « page N »"""
+    max_workers = 1
+
+    def __init__(self):
+        self.pages = []
+
+    def submit(self, func, path, first_page, last_page, *args):
+        future = Future()
+        pages = list(range(first_page, last_page + 1))
+        self.pages.extend(pages)
+        future.set_result([f"page {page}" for page in pages])
+        return future
+
+    def run(self, func, *args):
+        return self.submit(func, *args).result()
+
+def test_cached_pages_are_not_ocred_again():
+    """Test que seules les pages absentes du cache sont OCRisées"""
+    print("🧪 Test du cache des pages OCR...")
+    directory = tempfile.mkdtemp(prefix="docusense_ocr_")
+    try:
+        path = os.path.join(directory, "scan.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4 scan de test")
+        executor = FakeExecutor()
+        engine = OCREngine(executor, window_size=2, cache=PersistentLRUCache(os.path.join(directory, "cache"), 1024 * 1024))
+
+        assert list(engine.iter_pdf_pages(path, [1, 2])) == [(1, "page 1"), (2, "page 2")]
+        assert executor.pages == [1, 2]
+
+        assert engine.ocr_pdf(path, [1, 2, 3]) == "page 1\npage 2\npage 3"
+        assert executor.pages == [1, 2, 3]
+        print("✅ Pages en cache servies sans OCR")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_cached_pages_are_not_ocred_again()
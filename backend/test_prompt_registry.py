@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le registre des prompts
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from utils.prompt_registry import PromptRegistry
+
+def write_catalog(directory, prompts, contents):
+    with open(os.path.join(directory, "prompts_list.json"), "w", encoding="utf-8") as f:
+        json.dump(prompts, f)
+    for name, content in contents.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+def test_reload_on_change():
+    """Test du chargement, du hash de contenu et du rechargement après modification"""
+    print("🧪 Test du registre des prompts...")
+    directory = tempfile.mkdtemp(prefix="docusense_prompts_")
+    try:
+        prompts = [{"id": "resume", "content_file": "resume.txt", "system_role": "Assistant"}]
+        write_catalog(directory, prompts, {"resume.txt": "Résume le document."})
+        registry = PromptRegistry(os.path.join(directory, "prompts_list.json"), directory, check_interval=0)
+
+        meta, content = registry.get("resume")
+        assert content == "Résume le document."
+        first_hash = meta["content_hash"]
+        assert registry.default_prompt_id() == "resume"
+
+        # Nouvelle date de modification garantie même sur un système de fichiers peu précis
+        time.sleep(0.01)
+        write_catalog(directory, prompts, {"resume.txt": "Résume le document en trois points."})
+        path = os.path.join(directory, "resume.txt")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+        meta, content = registry.get("resume")
+        assert content.endswith("trois points.")
+        assert meta["content_hash"] != first_hash
+
+        try:
+            registry.get("inconnu")
+            assert False, "ValueError attendue"
+        except ValueError:
+            pass
+        print("✅ Prompt rechargé après modification")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_reload_on_change()
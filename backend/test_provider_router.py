@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le routage entre fournisseurs d'IA
+"""
+
+import time
+from utils.provider_router import CircuitBreaker, ProviderRouter
+
+def slow(prompt, system_role, model=None):
+    time.sleep(0.5)
+    return "lent"
+
+def fast(prompt, system_role, model=None):
+    return "rapide"
+
+def broken(prompt, system_role, model=None):
+    raise RuntimeError("Service indisponible")
+
+def make_router(primary, latency_budget=0.1):
+    return ProviderRouter(
+        {"primary": primary, "secondary": fast},
+        is_ready={"primary": lambda: True, "secondary": lambda: True},
+        secondaries={"primary": "secondary"},
+        latency_budget=latency_budget,
+        failure_threshold=2,
+        reset_timeout=0.2
+    )
+
+def test_hedge_when_budget_exceeded():
+    """Test de la requête de couverture au-delà du budget de latence"""
+    print("🧪 Test de la couverture...")
+    router = make_router(slow)
+    assert router.call("prompt", "rôle", "primary") == ("rapide", "secondary")
+    stats = router.get_stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+    print(f"✅ Statistiques: {stats}")
+
+def test_circuit_breaker():
+    """Test de la bascule, de l'ouverture du disjoncteur et de sa fermeture après un essai réussi"""
+    print("🧪 Test du disjoncteur...")
+    router = make_router(broken, latency_budget=0)
+    for _ in range(2):
+        assert router.call("prompt", "rôle", "primary") == ("rapide", "secondary")
+    assert router.breakers["primary"].state == "open"
+    assert router.candidates("primary") == ["secondary"]
+
+    time.sleep(0.25)
+    router.providers["primary"] = fast
+    assert router.call("prompt", "rôle", "primary") == ("rapide", "primary")
+    assert router.breakers["primary"].state == "closed"
+    print("✅ Disjoncteur ouvert puis refermé")
+
+def test_half_open_single_trial():
+    """Test qu'un seul appel d'essai passe pendant la demi-ouverture"""
+    print("🧪 Test de l'appel d'essai...")
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+    assert breaker.allow() and breaker.begin()
+    assert not breaker.allow() and not breaker.begin()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.begin()
+    print("✅ Un seul essai à la fois")
+
+if __name__ == "__main__":
+    test_hedge_when_budget_exceeded()
+    test_circuit_breaker()
+    test_half_open_single_trial()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Script de test pour les lecteurs de documents (Word, Excel, texte) et l'aperçu
+"""
+
+import os
+import shutil
+import tempfile
+import uuid
+
+import docx
+import openpyxl
+
+from utils.docx_stream import read_docx
+from utils import document_handler
+from utils.document_handler import read_excel, read_file, read_preview
+
+def test_docx_stream_order():
+    """Test de l'ordre des paragraphes, des tableaux et des en-têtes en lecture en flux"""
+    print("🧪 Test de la lecture Word en flux...")
+    directory = tempfile.mkdtemp(prefix="docusense_readers_")
+    try:
+        path = os.path.join(directory, "contrat.docx")
+        document = docx.Document()
+        document.sections[0].header.paragraphs[0].text = "Société Exemple"
+        document.add_paragraph("Article 1 : objet")
+        table = document.add_table(rows=2, cols=2)
+        table.cell(0, 0).text, table.cell(0, 1).text = "Prix", "Délai"
+        table.cell(1, 0).text, table.cell(1, 1).text = "1000 €", "30 jours"
+        document.add_paragraph("Article 2 : durée")
+        document.save(path)
+
+        text = read_docx(path)
+        assert text.startswith("-- En-tête --\nSociété Exemple")
+        assert text.index("Article 1") < text.index("Prix | Délai") < text.index("1000 € | 30 jours") < text.index("Article 2")
+        print("✅ Ordre du document respecté")
+    finally:
+        shutil.rmtree(directory)
+
+def test_excel_budget_keeps_header():
+    """Test du budget de caractères d'un classeur : en-tête conservé, lignes ignorées comptées"""
+    print("🧪 Test de la lecture Excel avec budget...")
+    directory = tempfile.mkdtemp(prefix="docusense_readers_")
+    try:
+        path = os.path.join(directory, "ventes.xlsx")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Ventes"
+        sheet.append(["Date", "Client", "Montant"])
+        for i in range(100):
+            sheet.append([f"2024-01-{i % 28 + 1:02d}", f"Client {i}", i * 10])
+        workbook.save(path)
+
+        full = read_excel(path)
+        assert "Client 99" in full and "lignes non lues" not in full
+
+        text = read_excel(path, 300)
+        assert len(text) <= 300
+        assert "-- Feuille: Ventes --\nDate Client Montant" in text
+        assert "lignes non lues" in text
+        print(f"✅ Texte borné: {text[-40:]!r}")
+    finally:
+        shutil.rmtree(directory)
+
+def test_excel_wide_sheets():
+    """Test d'un classeur à plusieurs feuilles larges : chaque feuille garde son nom et son en-tête coupé"""
+    print("🧪 Test de la lecture Excel de feuilles larges...")
+    directory = tempfile.mkdtemp(prefix="docusense_readers_")
+    try:
+        path = os.path.join(directory, "large.xlsx")
+        workbook = openpyxl.Workbook()
+        for index in range(3):
+            sheet = workbook.active if index == 0 else workbook.create_sheet()
+            sheet.title = f"Feuille{index}"
+            sheet.append([f"Colonne {i}" for i in range(40)])
+            for row in range(20):
+                sheet.append([f"v{row}-{i}" for i in range(40)])
+        workbook.save(path)
+
+        for budget in (200, 300, 501):
+            text = read_excel(path, budget)
+            assert len(text) <= budget
+            for index in range(3):
+                assert f"-- Feuille: Feuille{index} --\nColonne 0" in text
+                assert f"Feuille{index} --\nColonne 0 " in text and "\nv0-0 " in text
+            assert "[57 lignes non lues" in text
+        assert "Feuille0: 19, Feuille1: 19, Feuille2: 19" in read_excel(path, 501)
+        print("✅ En-têtes de toutes les feuilles conservés")
+    finally:
+        shutil.rmtree(directory)
+
+def test_excel_preview_matches_cached_read():
+    """Test que l'aperçu d'un classeur est identique avec ou sans texte complet en cache"""
+    print("🧪 Test de l'aperçu d'un classeur...")
+    directory = tempfile.mkdtemp(prefix="docusense_readers_")
+    try:
+        path = os.path.join(directory, "large.xlsx")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append([f"Colonne {i} {uuid.uuid4()}" for i in range(40)])
+        for row in range(50):
+            sheet.append([f"v{row}-{i}" for i in range(40)])
+        workbook.save(path)
+
+        preview = read_preview(path, 501)
+        assert read_file(path, 501) == preview
+        assert "v0-0" in preview and "lignes non lues" in preview
+        # Le texte complet en cache ne sert pas de découpe pour un lecteur à budget
+        read_file(path)
+        assert read_file(path, 501) == preview
+        print(f"✅ Aperçu identique ({len(preview)} caractères)")
+    finally:
+        shutil.rmtree(directory)
+
+def test_text_preview():
+    """Test de l'aperçu d'un fichier texte"""
+    print("🧪 Test de l'aperçu...")
+    directory = tempfile.mkdtemp(prefix="docusense_readers_")
+    try:
+        path = os.path.join(directory, "note.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Compte rendu de réunion. " * 100)
+        preview = read_preview(path, 50)
+        assert preview == ("Compte rendu de réunion. " * 100)[:50]
+        print(f"✅ Aperçu: {preview!r}")
+    finally:
+        shutil.rmtree(directory)
+
+def test_cache_serves_smaller_budgets():
+    """Test qu'un texte déjà extrait sert les budgets plus petits sans nouvelle extraction"""
+    print("🧪 Test du cache du texte extrait...")
+    directory = tempfile.mkdtemp(prefix="docusense_readers_")
+    run = document_handler.extraction_pool.run
+    calls = []
+    try:
+        path = os.path.join(directory, "rapport.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            # Contenu unique pour ne pas retrouver le texte d'une exécution précédente
+            f.write(f"Rapport {uuid.uuid4()}\n" + "Chiffre d'affaires en hausse. " * 200)
+        document_handler.extraction_pool.run = lambda *args: calls.append(args) or run(*args)
+
+        text = read_file(path, 1000)
+        assert read_file(path, 300) == text[:300]
+        assert len(calls) == 1
+        assert read_file(path, 2000)[:1000] == text
+        assert read_file(path, 1500) == read_file(path, 2000)[:1500]
+        assert len(calls) == 2
+        print(f"✅ {len(calls)} extractions pour 5 lectures")
+    finally:
+        document_handler.extraction_pool.run = run
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_docx_stream_order()
+    test_excel_budget_keeps_header()
+    test_excel_wide_sheets()
+    test_excel_preview_matches_cached_read()
+    test_text_preview()
+    test_cache_serves_smaller_budgets()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script de test pour le budget de jetons des prompts
+"""
+
+from utils.token_budget import MESSAGE_OVERHEAD_TOKENS, CharRatioEstimator, TokenBudgetManager
+
+def make_manager():
+    manager = TokenBudgetManager(target_fraction=0.75, output_reserve=1000, default_context_window=8000)
+    manager.register_estimator("", lambda: CharRatioEstimator(4))
+    return manager
+
+def test_budget_and_sentence_cut():
+    """Test du budget d'entrée et de la coupe sur une fin de phrase"""
+    print("🧪 Test de la coupe...")
+    manager = make_manager()
+    assert manager.input_budget("openai", "modele-inconnu", "") == 6000 - 8
+
+    text = "Une phrase de test assez courte. " * 100
+    cut, truncated = manager.truncate("modele", text, 200)
+    assert truncated and cut.endswith(".")
+    assert manager.count("modele", cut) <= 200
+    assert manager.truncate("modele", "court", 200) == ("court", False)
+    assert manager.count_prompt("modele", "a" * 40, "", "b" * 40) == 20 + MESSAGE_OVERHEAD_TOKENS
+    print(f"✅ Texte coupé à {len(cut)} caractères")
+
+def test_allocate_and_correction():
+    """Test du partage entre documents et de la correction par l'usage réel"""
+    print("🧪 Test du partage...")
+    manager = make_manager()
+    short, long = "a" * 40, "b " * 2000
+    kept_short, kept_long = manager.allocate("modele", [short, long], 300)
+    assert kept_short == short
+    assert manager.count("modele", kept_long) <= 290
+
+    for _ in range(5):
+        manager.record_usage("modele", "x" * 368, 200)
+    assert manager.count("modele", "x" * 400) == 200
+    print(f"✅ Statistiques: {manager.get_stats()}")
+
+if __name__ == "__main__":
+    test_budget_and_sentence_cut()
+    test_allocate_and_correction()
@@ -0,0 +1,194 @@
+"""
+Jobs d'extraction en masse
+
+Un job reçoit un répertoire ou une liste de chemins et remplit le cache du texte
+extrait en lisant les fichiers en parallèle (nombre de threads borné, le parsing
+lui-même étant exécuté dans le pool d'extraction). La progression, le débit
+(fichiers/s, Mo/s) et la durée de chaque fichier sont consultables pendant le job.
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from config import Config
+from utils.document_handler import is_text_cached, prefetch_text
+from utils.extraction_pool import extraction_pool
+from utils.reader_registry import reader_registry
+
+
+def list_supported_files(directory_path: str, recursive: bool = True) -> List[str]:
+    """Liste les fichiers d'un répertoire dont le format possède un lecteur"""
+    extensions = set(reader_registry.supported_extensions())
+    paths = []
+    for root, dirs, filenames in os.walk(directory_path):
+        dirs.sort()
+        for filename in sorted(filenames):
+            if "." in filename and filename.rsplit(".", 1)[-1].lower() in extensions:
+                paths.append(os.path.join(root, filename))
+        if not recursive:
+            break
+    return paths
+
+
+class ExtractionJob:
+    """Extraction d'une liste de fichiers vers le cache du texte extrait"""
+
+    def __init__(self, paths: List[str], max_workers: int):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.paths = paths
+        self.max_workers = max(1, min(max_workers, len(paths) or 1))
+        self.status = "pending"
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.results: List[Dict] = []
+        self._next_index = 0
+        self._bytes_done = 0
+        self._counts = {"extracted": 0, "cached": 0, "failed": 0}
+        self._start_time = None
+        self._elapsed = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Exécute le job avec max_workers threads qui se partagent la liste des fichiers"""
+        self.status = "running"
+        self.started_at = datetime.now().isoformat()
+        self._start_time = time.perf_counter()
+
+        threads = [threading.Thread(target=self._worker_loop, daemon=True) for _ in range(self.max_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self._elapsed = time.perf_counter() - self._start_time
+        self.finished_at = datetime.now().isoformat()
+        self.status = "cancelled" if self._cancelled.is_set() else "completed"
+        print(f"📦 Job d'extraction {self.job_id} {self.status} : {len(self.results)}/{len(self.paths)} fichiers en {self._elapsed:.1f} s")
+
+    def _next_path(self) -> Optional[str]:
+        with self._lock:
+            if self._cancelled.is_set() or self._next_index >= len(self.paths):
+                return None
+            path = self.paths[self._next_index]
+            self._next_index += 1
+            return path
+
+    def _worker_loop(self):
+        while True:
+            path = self._next_path()
+            if path is None:
+                return
+            self._record(self._extract(path))
+
+    def _extract(self, path: str) -> Dict:
+        result = {"path": path, "size": None, "chars": None, "duration_ms": None, "cached": False, "error": None}
+        start = time.perf_counter()
+        try:
+            result["size"] = os.path.getsize(path)
+            result["cached"] = is_text_cached(path)
+            result["chars"] = len(prefetch_text(path))
+        except Exception as e:
+            result["error"] = str(e)
+        result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def _record(self, result: Dict):
+        with self._lock:
+            self.results.append(result)
+            if result["error"]:
+                self._counts["failed"] += 1
+            else:
+                self._counts["cached" if result["cached"] else "extracted"] += 1
+                self._bytes_done += result["size"] or 0
+
+    def cancel(self):
+        """Arrête le job après les fichiers en cours"""
+        self._cancelled.set()
+
+    def get_summary(self) -> Dict:
+        with self._lock:
+            processed = len(self.results)
+            if self._elapsed is not None:
+                elapsed = self._elapsed
+            elif self._start_time is not None:
+                elapsed = time.perf_counter() - self._start_time
+            else:
+                elapsed = 0.0
+            durations = sorted(r["duration_ms"] for r in self.results if not r["error"])
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "max_workers": self.max_workers,
+                "total_files": len(self.paths),
+                "processed_files": processed,
+                "progress": round(processed / len(self.paths) * 100, 1) if self.paths else 100.0,
+                **self._counts,
+                "elapsed_seconds": round(elapsed, 2),
+                "files_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+                "mb_per_second": round(self._bytes_done / (1024 * 1024) / elapsed, 2) if elapsed else 0.0,
+                "avg_file_ms": round(sum(durations) / len(durations), 1) if durations else None,
+                "max_file_ms": durations[-1] if durations else None
+            }
+
+    def get_results(self, offset: int = 0, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            return list(self.results[offset:offset + limit])
+
+
+class BulkExtractionManager:
+    """Crée les jobs d'extraction et conserve les plus récents en mémoire"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_jobs: int = 20):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ExtractionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_job(self, directory_path: Optional[str] = None, paths: Optional[Iterable[str]] = None,
+                  recursive: bool = True, max_workers: Optional[int] = None) -> ExtractionJob:
+        """Lance un job sur un répertoire et/ou une liste de chemins"""
+        job_paths = list_supported_files(directory_path, recursive) if directory_path else []
+        if paths:
+            known = set(job_paths)
+            job_paths.extend(path for path in dict.fromkeys(paths) if path not in known)
+
+        # Par défaut, autant de threads que de processus d'extraction, jamais davantage
+        workers = max_workers or self.max_workers or extraction_pool.max_workers
+        workers = min(max(1, workers), extraction_pool.max_workers)
+        job = ExtractionJob(job_paths, workers)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest_id = next(iter(self._jobs))
+                if self._jobs[oldest_id].status == "running":
+                    break
+                del self._jobs[oldest_id]
+
+        threading.Thread(target=job.run, daemon=True).start()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ExtractionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.get_summary() for job in reversed(jobs)]
+
+
+# Instance globale
+bulk_extraction_manager = BulkExtractionManager(
+    max_workers=Config.BULK_EXTRACTION_MAX_WORKERS,
+    max_jobs=Config.BULK_EXTRACTION_MAX_JOBS
+)
@@ -0,0 +1,203 @@
+"""
+Cache persistant sur disque avec éviction LRU bornée en taille
+
+Chaque entrée est stockée dans un fichier texte dont le nom dérive de la clé,
+et un index JSON conserve la taille et la date du dernier accès de chaque
+entrée pour reconstruire l'ordre LRU au redémarrage. L'index n'est pas réécrit
+à chaque modification mais au plus une fois par flush_interval, et à l'arrêt.
+"""
+
+import os
+import atexit
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class PersistentLRUCache:
+    """Cache clé/texte persistant, borné en octets, avec compteurs hit/miss"""
+
+    def __init__(self, directory: str, max_bytes: int, ttl: Optional[float] = None, flush_interval: float = 2.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.index_file = os.path.join(directory, "index.json")
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer = None
+        self._entries = self._load_index()
+        self._total_bytes = sum(entry["size"] for entry in self._entries.values())
+        self.hits = 0
+        self.misses = 0
+        atexit.register(self.flush)
+
+    def _load_index(self) -> "OrderedDict[str, Dict]":
+        """Charge l'index et le trie du moins récemment utilisé au plus récent"""
+        entries = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                entries = {}
+
+        # Ignorer les entrées dont le fichier a disparu
+        entries = {
+            key: entry for key, entry in entries.items()
+            if os.path.exists(self._entry_path(key))
+        }
+
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1]["last_access"]))
+
+    def _save_index(self):
+        """Planifie la sauvegarde de l'index (appelé sous le verrou du cache)"""
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Écrit l'index sur disque de façon atomique s'il a changé depuis la dernière sauvegarde"""
+        with self._save_lock:
+            with self._lock:
+                self._flush_timer = None
+                if not self._dirty:
+                    return
+                snapshot = json.dumps(self._entries)
+                self._dirty = False
+
+            # Dossier supprimé (cache vidé à la main, tests) : rien à sauvegarder
+            if not os.path.isdir(self.directory):
+                return
+            # Écriture hors du verrou du cache : les lectures ne sont pas bloquées
+            tmp_path = self.index_file + ".tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.index_file)
+            except IOError as e:
+                print(f"Erreur lors de la sauvegarde de l'index du cache: {e}")
+
+    def _entry_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.txt")
+
+    def _is_expired(self, entry: Dict) -> bool:
+        return self.ttl is not None and time.time() - entry["created_at"] > self.ttl
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry["size"]
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à respecter la limite"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Retourne la valeur associée à la clé, ou None si absente"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                self._remove(key)
+                self._save_index()
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            try:
+                with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                    value = f.read()
+            except IOError:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            entry["last_access"] = time.time()
+            self._entries.move_to_end(key)
+            # L'ordre LRU doit survivre au redémarrage, même sans écriture
+            self._save_index()
+            self.hits += 1
+            return value
+
+    def contains(self, key: str) -> bool:
+        """Indique si une entrée valide existe, sans la lire ni modifier les statistiques"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry)
+
+    def set(self, key: str, value: str):
+        """Enregistre une valeur et applique la politique d'éviction"""
+        data = value.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            try:
+                with open(self._entry_path(key), 'wb') as f:
+                    f.write(data)
+            except IOError as e:
+                print(f"Erreur lors de l'écriture dans le cache: {e}")
+                return
+
+            now = time.time()
+            self._entries[key] = {"size": len(data), "created_at": now, "last_access": now}
+            self._total_bytes += len(data)
+            self._evict()
+            self._save_index()
+
+    def delete(self, key: str):
+        """Supprime une entrée du cache"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._save_index()
+
+    def delete_matching(self, predicate: Callable[[str], bool]) -> int:
+        """Supprime toutes les entrées dont la clé satisfait le prédicat"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            if keys:
+                self._save_index()
+            return len(keys)
+
+    def clear(self):
+        """Vide complètement le cache"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self._save_index()
+
+    def get_stats(self) -> Dict:
+        """Retourne les statistiques d'utilisation du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,146 @@
+"""
+Analyse des documents longs par découpage (map-reduce)
+
+Le texte est découpé en morceaux sur les limites de paragraphes (puis de lignes),
+chaque morceau est analysé par un appel à l'IA exécuté en parallèle, puis un appel
+final combine les analyses partielles. Les résultats de chaque appel sont mis en
+cache : relancer une analyse ne refait que les morceaux qui avaient échoué.
+"""
+
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from config import Config
+from utils.cache_store import PersistentLRUCache
+
+# Cache des réponses de l'IA pour chaque morceau et chaque étape de combinaison
+chunk_cache = PersistentLRUCache(Config.CHUNK_CACHE_DIR, Config.CHUNK_CACHE_MAX_BYTES, ttl=Config.CHUNK_CACHE_TTL)
+
+
+class ChunkedAnalysisError(Exception):
+    """Un ou plusieurs morceaux n'ont pas pu être analysés"""
+
+
+class UncachedResponse(str):
+    """Réponse à ne pas mettre en cache (produite par un autre fournisseur que celui demandé)"""
+
+
+def _split_long_block(block: str, chunk_chars: int) -> List[str]:
+    """Découpe un bloc trop long sur les fins de ligne, puis à taille fixe"""
+    pieces = []
+    current = ""
+    for line in block.splitlines(keepends=True):
+        while len(line) > chunk_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:chunk_chars])
+            line = line[chunk_chars:]
+        if current and len(current) + len(line) > chunk_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_text(text: str, chunk_chars: int) -> List[str]:
+    """Regroupe les paragraphes en morceaux d'au plus chunk_chars caractères"""
+    chunks = []
+    current = ""
+    for block in re.split(r"(?<=\n)\s*\n", text):
+        pieces = [block] if len(block) <= chunk_chars else _split_long_block(block, chunk_chars)
+        for piece in pieces:
+            separator = "\n" if current else ""
+            if current and len(current) + len(separator) + len(piece) > chunk_chars:
+                chunks.append(current)
+                current, separator = "", ""
+            current += separator + piece
+    if current.strip():
+        chunks.append(current)
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def _cached_call(call_ai: Callable[[str], str], prompt: str, namespace: str) -> str:
+    key = hashlib.sha256(f"{namespace}\n{prompt}".encode("utf-8")).hexdigest()
+    cached = chunk_cache.get(key)
+    if cached is not None:
+        return cached
+    response = call_ai(prompt)
+    if not isinstance(response, UncachedResponse):
+        chunk_cache.set(key, response)
+    return response
+
+def _run_all(call_ai: Callable[[str], str], prompts: List[str], namespace: str, concurrency: int) -> List[str]:
+    """Exécute les appels en parallèle ; échoue après coup si l'un d'eux a échoué"""
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(prompts)))) as executor:
+        futures = [executor.submit(_cached_call, call_ai, prompt, namespace) for prompt in prompts]
+
+    results, errors = [], []
+    for index, future in enumerate(futures, start=1):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            errors.append(f"partie {index} : {e}")
+    if errors:
+        raise ChunkedAnalysisError(
+            f"{len(errors)}/{len(prompts)} parties en échec (les autres sont en cache) - " + " ; ".join(errors[:3])
+        )
+    return results
+
+def _map_prompt(prompt_content: str, chunk: str, index: int, total: int) -> str:
+    return f"{prompt_content}\n\nContenu du document (partie {index}/{total}) :\n{chunk}"
+
+def _reduce_prompt(prompt_content: str, partials: List[str], first_index: int) -> str:
+    sections = "\n\n".join(
+        f"--- Analyse partielle {first_index + i} ---\n{partial}" for i, partial in enumerate(partials)
+    )
+    return (
+        f"{prompt_content}\n\n"
+        "Le document a été analysé par parties. Combine les analyses partielles ci-dessous "
+        "en une seule réponse au format demandé, sans répétition ni information inventée :\n\n"
+        f"{sections}"
+    )
+
+def analyze_chunked(text: str, prompt_content: str, call_ai: Callable[[str], str], chunk_chars: int,
+                    namespace: str, concurrency: Optional[int] = None) -> dict:
+    """Analyse un texte par morceaux puis combine les résultats.
+
+    call_ai reçoit un prompt complet et retourne la réponse de l'IA (UncachedResponse
+    pour ne pas la garder en cache). namespace identifie le fournisseur, le modèle et
+    le rôle système pour les clés du cache.
+    """
+    concurrency = concurrency or Config.CHUNKED_ANALYSIS_CONCURRENCY
+    chunks = split_text(text, chunk_chars)
+    if not chunks:
+        return {"analysis": "", "chunks": 0, "reduce_calls": 0}
+    if len(chunks) == 1:
+        return {"analysis": _cached_call(call_ai, _map_prompt(prompt_content, chunks[0], 1, 1), namespace).strip(),
+                "chunks": 1, "reduce_calls": 0}
+
+    map_prompts = [_map_prompt(prompt_content, chunk, i, len(chunks)) for i, chunk in enumerate(chunks, start=1)]
+    partials = _run_all(call_ai, map_prompts, namespace, concurrency)
+
+    # Combinaison par niveaux tant que les analyses partielles dépassent le budget d'un appel
+    reduce_calls = 0
+    while len(partials) > 1:
+        groups, group, size = [], [], 0
+        for partial in partials:
+            if group and size + len(partial) > chunk_chars:
+                groups.append(group)
+                group, size = [], 0
+            group.append(partial)
+            size += len(partial)
+        groups.append(group)
+        if len(groups) == len(partials):
+            # Chaque analyse partielle remplit déjà le budget : combinaison par paires
+            groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+
+        first_indexes = [sum(len(g) for g in groups[:i]) + 1 for i in range(len(groups))]
+        reduce_prompts = [_reduce_prompt(prompt_content, g, first) for g, first in zip(groups, first_indexes)]
+        partials = _run_all(call_ai, reduce_prompts, namespace, concurrency)
+        reduce_calls += len(reduce_prompts)
+
+    return {"analysis": partials[0].strip(), "chunks": len(chunks), "reduce_calls": reduce_calls}
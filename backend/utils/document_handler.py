@@ -1,86 +1,417 @@
 import os
+import sys
 import json
-import fitz  # PyMuPDF
-import pytesseract
 import shutil
+import time
 import hashlib
-import pandas as pd
-from PIL import Image
 from datetime import datetime
-from docx import Document
-from pdf2image import convert_from_path
 from email import policy
 from flask import current_app
 import email
 from config import Config
 from werkzeug.utils import secure_filename
-from utils.openai_utils import call_openai_api
+from utils.openai_utils import OPENAI_OPTIONS
 from utils.local_ai import local_ai
+from utils.ocr_engine import ocr_engine
+from utils.cache_store import PersistentLRUCache
+from utils.unified_file_manager import unified_file_manager
+from utils.reader_registry import FormatReader, collect_text, lazy_import, reader_registry
+from utils.docx_stream import iter_docx_chunks, read_docx
+from utils.extraction_pool import extraction_pool
+from utils.prompt_registry import prompt_registry
+from utils.chunked_analysis import UncachedResponse, analyze_chunked
+from utils.llm_cache import estimate_tokens, llm_response_cache
+from utils.provider_router import provider_router
+from utils.model_routing import resolve_models, route_stats
+from utils.token_budget import token_budget
+
+# Dépendances lourdes chargées au premier usage
+fitz = lazy_import("fitz")  # PyMuPDF
+openpyxl = lazy_import("openpyxl")
+xlrd = lazy_import("xlrd")
+
+
+# Cache persistant du texte extrait, partagé par toutes les routes qui lisent des fichiers
+extracted_text_cache = PersistentLRUCache(Config.TEXT_CACHE_DIR, Config.TEXT_CACHE_MAX_BYTES)
+
+# Nombre de pages PDF classées par tâche du pool d'extraction
+PDF_CLASSIFY_BATCH_SIZE = 8
 
 
 # ---------- Lecture de fichiers selon leur type ----------
-def read_docx(path):
-    doc = Document(path)
-    return "\n".join(p.text for p in doc.paragraphs).strip()
+def iter_pdf_pages(path):
+    """Génère le texte du PDF page par page sans charger tout le document"""
+    with fitz.open(path) as doc:
+        for page in doc:
+            yield page.get_text()
+
+def read_pdf(path, max_chars=None):
+    text, _ = collect_text(iter_pdf_pages(path), max_chars)
+    return text
+
+def classify_pdf_page(page):
+    """Détermine si une page possède une couche texte exploitable ou doit passer par l'OCR.
+
+    Retourne un booléen indiquant si l'OCR est nécessaire et le texte de la couche texte.
+    """
+    text = page.get_text()
+    if len(text.strip()) >= Config.OCR_MIN_PAGE_CHARS:
+        return False, text
+
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return False, text
+
+    image_area = 0.0
+    for image in page.get_image_info():
+        visible = fitz.Rect(image["bbox"]) & page_rect
+        if not visible.is_empty:
+            image_area += visible.width * visible.height
+
+    return min(image_area / page_area, 1.0) >= Config.OCR_MIN_IMAGE_COVERAGE, text
+
+def classify_pdf_pages(path, first_page, count):
+    """Classe un lot de pages (1-indexées) ; exécuté dans le pool d'extraction"""
+    with fitz.open(path) as doc:
+        last_page = min(first_page - 1 + count, doc.page_count)
+        return [classify_pdf_page(doc[index]) for index in range(first_page - 1, last_page)]
+
+def iter_classified_pdf_pages(path):
+    """Génère (OCR nécessaire, texte) pour chaque page, classées par lots dans le pool"""
+    first_page = 1
+    while True:
+        batch = extraction_pool.run(classify_pdf_pages, path, first_page, PDF_CLASSIFY_BATCH_SIZE)
+        yield from batch
+        if len(batch) < PDF_CLASSIFY_BATCH_SIZE:
+            return
+        first_page += PDF_CLASSIFY_BATCH_SIZE
+
+def iter_pdf_pages_hybrid(path, use_ocr, scanned_pages):
+    """Génère le texte page par page en OCRisant uniquement les pages scannées.
+
+    Sans OCR, les pages scannées rencontrées sont ajoutées à scanned_pages sous la
+    forme (numéro de page, nombre de caractères produits avant elle).
+    """
+    # Les pages scannées consécutives sont regroupées pour être OCRisées en parallèle
+    lookahead = ocr_engine.max_pages_in_flight if use_ocr else 1
+    produced = 0
+
+    def flush(pages):
+        if not use_ocr:
+            scanned_pages.extend((page, produced) for page in pages)
+            return
+        for _, text in ocr_engine.iter_pdf_pages(path, pages):
+            yield text
+
+    pending_ocr = []
+    for page_number, (needs_ocr, text) in enumerate(iter_classified_pdf_pages(path), start=1):
+        if needs_ocr:
+            pending_ocr.append(page_number)
+            if len(pending_ocr) < lookahead:
+                continue
+        if pending_ocr:
+            for ocr_text in flush(pending_ocr):
+                produced += len(ocr_text)
+                yield ocr_text
+            pending_ocr = []
+        if not needs_ocr:
+            produced += len(text)
+            yield text
+    if pending_ocr:
+        yield from flush(pending_ocr)
+
+def pdf_hybrid_cache_key(content_hash, use_ocr=False):
+    mode = ocr_engine.get_settings_fingerprint() if use_ocr else "text"
+    return f"{content_hash}:{Config.EXTRACTOR_VERSION}:hybrid:{mode}"
+
+def serve_cached_text(entry, max_chars, supports_budget=False):
+    """Texte servi par une entrée du cache du texte extrait, None si elle ne couvre pas le budget.
+
+    Une entrée garde le plus long début de texte extrait jusqu'ici (budget "max_chars",
+    None si lu sans budget) et indique si le document a été lu en entier. Un budget
+    plus petit est servi par découpe, sauf pour un lecteur qui applique lui-même le
+    budget (Excel) : son texte n'est pas un début du texte complet.
+    """
+    if entry is None:
+        return None
+    if supports_budget:
+        if entry["max_chars"] == max_chars or (max_chars is None and entry["complete"]):
+            return entry["text"]
+        return None
+    if entry["complete"] or (max_chars is not None and entry["max_chars"] is not None and entry["max_chars"] >= max_chars):
+        return entry["text"][:max_chars]
+    return None
+
+def _store_text(cache_key, previous, text, complete, max_chars, **extra):
+    """Enregistre une extraction sauf si l'entrée existante couvre déjà davantage du document"""
+    if previous is not None and previous["complete"] and not complete:
+        return
+    if previous is not None and not complete and previous["max_chars"] is not None and max_chars is not None \
+            and previous["max_chars"] > max_chars:
+        return
+    extracted_text_cache.set(cache_key, json.dumps({
+        "text": text, "complete": complete, "max_chars": max_chars, **extra
+    }))
+
+def _cached_entry(cache_key):
+    cached = extracted_text_cache.get(cache_key)
+    return json.loads(cached) if cached is not None else None
+
+def read_pdf_hybrid(path, max_chars=None, use_ocr=False):
+    """Lit un PDF en combinant couche texte et OCR des seules pages scannées.
+
+    Retourne le texte et la liste des pages scannées ignorées faute d'OCR. Le cache
+    ne dépend pas du budget : un texte plus long déjà extrait sert les budgets plus petits.
+    """
+    content_hash = unified_file_manager.get_file_hash(path)
+    cache_key = pdf_hybrid_cache_key(content_hash, use_ocr)
+    entry = _cached_entry(cache_key) if content_hash else None
+    text = serve_cached_text(entry, max_chars)
+    if text is not None:
+        scanned = entry["scanned_pages"]
+    else:
+        scanned = []
+        text, complete = collect_text(iter_pdf_pages_hybrid(path, use_ocr, scanned), max_chars)
+        if content_hash:
+            _store_text(cache_key, entry, text, complete, None if complete else max_chars, scanned_pages=scanned)
 
-def read_pdf(path):
-    doc = fitz.open(path)
-    return "".join(page.get_text() for page in doc).strip()
+    # Seules les pages scannées situées dans le texte retenu sont signalées
+    return text, [page for page, offset in scanned if max_chars is None or offset < max_chars]
 
-def read_eml(path):
+def iter_eml_chunks(path):
+    """Génère les parties text/plain d'un email, dans l'ordre du message"""
     with open(path, "rb") as f:
         msg = email.message_from_binary_file(f, policy=policy.default)
-    if msg.is_multipart():
-        parts = [p.get_content() for p in msg.walk() if p.get_content_type() == "text/plain"]
-        return "\n".join(parts).strip()
-    return msg.get_content().strip()
+    if not msg.is_multipart():
+        yield msg.get_content()
+        return
+    separator = ""
+    for part in msg.walk():
+        if part.get_content_type() == "text/plain":
+            yield separator + part.get_content()
+            separator = "\n"
 
-def read_txt(path):
+def read_eml(path):
+    return "".join(iter_eml_chunks(path)).strip()
+
+def preview_eml(path, max_chars):
+    """Aperçu limité à la première partie text/plain de l'email"""
+    for part in iter_eml_chunks(path):
+        return part.strip()[:max_chars]
+    return ""
+
+def iter_txt_chunks(path, block_size=65536):
+    """Génère le contenu d'un fichier texte par blocs de caractères"""
     with open(path, "r", encoding="utf-8") as f:
-        return f.read().strip()
-
-def read_excel(path):
-    xls = pd.ExcelFile(path)
-    text = ""
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name=sheet)
-        text += f"\n-- Feuille: {sheet} --\n"
-        text += df.fillna('').astype(str).agg(' '.join, axis=1).str.cat(sep='\n')
-    return text.strip()
-
-def read_file(path):
+        while block := f.read(block_size):
+            yield block
+
+def read_txt(path):
+    return "".join(iter_txt_chunks(path)).strip()
+
+def _format_excel_row(values):
+    return " ".join("" if value is None else str(value) for value in values).strip()
+
+def _iter_excel_sheets(path):
+    """Génère (nom de feuille, nombre de lignes ou None, itérateur de lignes, nombre de
+    feuilles restantes après celle-ci) en lecture seule"""
     ext = path.rsplit(".", 1)[1].lower()
-    match ext:
-        case "pdf":
-            return read_pdf(path)
-        case "doc" | "docx":
-            return read_docx(path)
-        case "eml":
-            return read_eml(path)
-        case "txt":
-            return read_txt(path)
-        case "xls" | "xlsx":
-            return read_excel(path)
-        case _:
-            raise ValueError(f"Type de fichier non supporté : .{ext}")
+    if ext == "xls":
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            sheet_names = book.sheet_names()
+            for index, sheet_name in enumerate(sheet_names):
+                sheet = book.sheet_by_name(sheet_name)
+                rows = (sheet.row_values(i) for i in range(sheet.nrows))
+                yield sheet_name, sheet.nrows, rows, len(sheet_names) - index - 1
+                book.unload_sheet(sheet_name)
+        finally:
+            book.release_resources()
+        return
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = workbook.worksheets
+        for index, sheet in enumerate(sheets):
+            yield sheet.title, sheet.max_row, sheet.iter_rows(values_only=True), len(sheets) - index - 1
+    finally:
+        workbook.close()
+
+def _count_remaining_rows(total_rows, rows_consumed, rows):
+    """Nombre de lignes non lues, la ligne courante comprise"""
+    if total_rows is not None:
+        return total_rows - rows_consumed
+    # Dimension absente du fichier : comptage en poursuivant la lecture en flux
+    return 1 + sum(1 for _ in rows)
+
+def _cut(text, limit):
+    """Coupe une ligne trop longue en signalant la coupe ; vide si la place manque"""
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1] + "…" if limit > 1 else ""
+
+def iter_excel_chunks(path, max_chars=None, max_rows=None):
+    """Génère le texte d'un classeur ligne par ligne sans charger les feuilles en mémoire.
+
+    Le nom et la ligne d'en-tête de chaque feuille sont toujours conservés : avec un
+    budget de caractères, une place est réservée pour les en-têtes des feuilles
+    suivantes et un en-tête trop large est coupé. Une fois le budget de caractères
+    ou de lignes atteint, les lignes de données restantes sont comptées et signalées.
+    """
+    if max_rows is None:
+        max_rows = Config.EXCEL_MAX_ROWS or None
+    # Place réservée au récapitulatif des lignes ignorées
+    reserve = min(200, max_chars // 4) if max_chars else 0
+    available = max_chars - reserve if max_chars else None
+
+    used_chars = 0
+    data_rows_read = 0
+    skipped_rows = {}
+
+    for sheet_name, total_rows, rows, sheets_left in _iter_excel_sheets(path):
+        header = None
+        rows_seen = 0
+        sheet_rows_read = 0
+        limit = None
+        if available is not None:
+            # Part du budget restant pour cette feuille ; les suivantes gardent de quoi
+            # afficher leur en-tête
+            share = (available - used_chars) // (sheets_left + 1)
+            limit = available - sheets_left * min(share, 200)
+
+        for values in rows:
+            rows_seen += 1
+            line = _format_excel_row(values)
+            if not line:
+                continue
+
+            if header is None:
+                title = f"\n-- Feuille: {sheet_name} --\n"
+                if limit is not None:
+                    # L'en-tête prend au plus la moitié de la part restant après le nom de la
+                    # feuille, pour laisser voir des données
+                    line = _cut(line, (share - len(title) - 1) // 2)
+                    if not line or used_chars + len(title) + len(line) + 1 > limit:
+                        # L'en-tête n'est pas compté parmi les lignes non lues
+                        skipped_rows[sheet_name] = _count_remaining_rows(total_rows, rows_seen - 1, rows) - 1
+                        break
+                header = f"{title}{line}\n"
+                used_chars += len(header)
+                yield header
+                continue
+
+            if limit is not None and used_chars + len(line) + 1 > limit and sheet_rows_read == 0:
+                # Première ligne de données trop large : elle est coupée plutôt qu'omise
+                line = _cut(line, limit - used_chars - 1)
+            budget_reached = (
+                (limit is not None and (not line or used_chars + len(line) + 1 > limit))
+                or (max_rows is not None and data_rows_read >= max_rows)
+            )
+            if budget_reached:
+                skipped_rows[sheet_name] = _count_remaining_rows(total_rows, rows_seen - 1, rows)
+                break
+
+            used_chars += len(line) + 1
+            data_rows_read += 1
+            sheet_rows_read += 1
+            yield line + "\n"
+
+    if skipped_rows:
+        details = ", ".join(f"{name}: {count}" for name, count in skipped_rows.items())
+        summary = f"\n[{sum(skipped_rows.values())} lignes non lues ({details})]"
+        if max_chars is not None and used_chars + len(summary) > max_chars:
+            summary = f"\n[{sum(skipped_rows.values())} lignes non lues]"
+        yield summary
+
+def read_excel(path, max_chars=None, max_rows=None):
+    return "".join(iter_excel_chunks(path, max_chars, max_rows)).strip()
+
+# Enregistrement des lecteurs par extension
+reader_registry.register(("pdf",), FormatReader("pdf", iter_chunks=iter_pdf_pages))
+reader_registry.register(("doc", "docx"), FormatReader("docx", iter_chunks=iter_docx_chunks))
+reader_registry.register(("eml",), FormatReader("eml", iter_chunks=iter_eml_chunks, preview=preview_eml))
+reader_registry.register(("txt",), FormatReader("txt", iter_chunks=iter_txt_chunks))
+reader_registry.register(("xls", "xlsx"), FormatReader("excel", iter_chunks=iter_excel_chunks, supports_budget=True))
+
+def iter_text_chunks(path, max_chars=None):
+    """Génère le texte d'un fichier par morceaux via le lecteur associé à son extension"""
+    return reader_registry.get_reader(path).iter_chunks(path, max_chars)
+
+def preview_text(path, max_chars):
+    """Lit le début d'un fichier ; exécuté dans le pool d'extraction"""
+    return reader_registry.get_reader(path).read_preview(path, max_chars)
+
+def read_preview(path, max_chars):
+    """Retourne le début du texte d'un fichier en ne lisant que le nécessaire.
+
+    Le cache n'est pas consulté : calculer le hash imposerait de lire tout le fichier.
+    """
+    return extraction_pool.run(preview_text, path, max_chars)
+
+def extract_text_with_status(path, max_chars=None):
+    """Extrait le texte sans passer par le cache ; exécuté dans le pool d'extraction.
+
+    Retourne le texte et un booléen indiquant si le document a été lu en entier.
+    """
+    reader = reader_registry.get_reader(path)
+    text, complete = collect_text(reader.iter_chunks(path, max_chars), max_chars)
+    # Un lecteur qui applique lui-même le budget ne permet pas de savoir s'il a tout lu
+    return text, complete and not (reader.supports_budget and max_chars is not None)
+
+def extract_text(path, max_chars=None):
+    """Extrait le texte d'un fichier sans passer par le cache"""
+    text, _ = extract_text_with_status(path, max_chars)
+    return text
+
+def is_pdf(path):
+    return path.rsplit(".", 1)[-1].lower() == "pdf"
+
+def is_text_cached(path):
+    """Indique si le texte complet du fichier, tel que l'analyse le lit, est déjà dans le cache"""
+    content_hash = unified_file_manager.get_file_hash(path)
+    if not content_hash:
+        return False
+    key = pdf_hybrid_cache_key(content_hash) if is_pdf(path) else f"{content_hash}:{Config.EXTRACTOR_VERSION}"
+    entry = _cached_entry(key)
+    return entry is not None and entry["complete"]
+
+def prefetch_text(path):
+    """Remplit le cache avec le texte complet lu par l'analyse (couche texte hybride pour les PDF)"""
+    if is_pdf(path):
+        text, _ = read_pdf_hybrid(path)
+        return text
+    return read_file(path)
+
+def read_file(path, max_chars=None):
+    """Lit le texte d'un fichier en réutilisant le cache si le contenu n'a pas changé.
+
+    Avec max_chars, l'extraction s'arrête dès que le budget est rempli. Le cache est
+    indexé par le contenu du fichier et la version de l'extracteur seulement (voir
+    serve_cached_text). En cas d'absence du cache, l'extraction est exécutée dans le
+    pool de processus isolés.
+    """
+    content_hash = unified_file_manager.get_file_hash(path)
+    if not content_hash:
+        text, _ = extraction_pool.run(extract_text_with_status, path, max_chars)
+        return text
+
+    supports_budget = reader_registry.get_reader(path).supports_budget
+    cache_key = f"{content_hash}:{Config.EXTRACTOR_VERSION}"
+    entry = _cached_entry(cache_key)
+    text = serve_cached_text(entry, max_chars, supports_budget)
+    if text is not None:
+        return text
+
+    text, complete = extraction_pool.run(extract_text_with_status, path, max_chars)
+    # Un document lu en entier avant d'atteindre le budget est mis en cache comme texte complet
+    _store_text(cache_key, entry, text, complete, None if complete else max_chars)
+    return text
 
 
 # ---------- OCR ----------
 def perform_ocr(path):
-    ext = path.rsplit(".", 1)[1].lower()
-    text = ""
-
-    if ext == "pdf":
-        if not os.path.exists(Config.POPPLER_PATH):
-            raise FileNotFoundError(f"Poppler non trouvé au chemin {Config.POPPLER_PATH}. Vérifiez le .env.")
-        images = convert_from_path(path, poppler_path=Config.POPPLER_PATH)
-        for img in images:
-            text += pytesseract.image_to_string(img, lang='fra') + "\n"
-    else:
-        img = Image.open(path)
-        text = pytesseract.image_to_string(img, lang='fra')
-
-    return text.strip()
+    return ocr_engine.ocr_file(path)
 
 
 # ---------- Hash ----------
@@ -93,34 +424,143 @@ def file_hash(path, block_size=65536):
 
 
 # ---------- Analyse avec IA (OpenAI ou Locale) ----------
-def load_prompts_metadata(prompts_json_path):
-    if not os.path.exists(prompts_json_path):
-        return []
-    with open(prompts_json_path, 'r', encoding='utf-8') as f:
-        prompts = json.load(f)
-    return prompts
-
-def analyse_document_with_text(text, prompt_id, ia_mode="openai"):
-    if not os.path.exists(Config.PROMPTS_JSON):
-        raise FileNotFoundError("Fichier de prompt introuvable")
-
-    with open(Config.PROMPTS_JSON, "r", encoding="utf-8") as f:
-        prompts = json.load(f)
-
-    prompt_meta = next((p for p in prompts if p["id"] == prompt_id), None)
-    if not prompt_meta:
-        raise ValueError(f"Prompt introuvable : {prompt_id}")
-
-    prompt_filename = prompt_meta.get("content_file")
-    if not prompt_filename:
-        raise ValueError("Le champ 'content_file' est manquant")
-
-    prompt_path = os.path.join(Config.PROMPT_CONTENT_DIR, prompt_filename)
-    if not os.path.exists(prompt_path):
-        raise FileNotFoundError(f"Fichier de prompt manquant : {prompt_path}")
-
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        prompt_content = f.read()
+def route_providers(ia_mode="openai", ready_only=False):
+    """Fournisseurs pouvant recevoir l'appel : le demandé puis son secondaire éventuel"""
+    providers = [ia_mode]
+    secondary = provider_router.secondaries.get(ia_mode)
+    if secondary and secondary != ia_mode and secondary in provider_router.providers:
+        if not ready_only or provider_router.is_ready[secondary]():
+            providers.append(secondary)
+    return providers
+
+def count_tokens(ia_mode, *texts):
+    """Jetons estimés des textes avec le modèle par défaut du mode, avant le choix du modèle"""
+    return token_budget.count(get_model_signature(ia_mode)["model"], "".join(text for text in texts if text))
+
+def call_ai(final_prompt, prompt_meta, ia_mode="openai"):
+    """Envoie un prompt complet à l'IA via le routeur, avec le modèle prévu par les règles du prompt.
+
+    Retourne (réponse, fournisseur, modèle) et enregistre la latence et les jetons de la route.
+    """
+    system_role = prompt_meta["system_role"]
+    input_tokens = count_tokens(ia_mode, system_role, final_prompt)
+    models = resolve_models(prompt_meta, input_tokens, route_providers(ia_mode), requested=ia_mode)
+    started = time.monotonic()
+    try:
+        analysis, provider = provider_router.call(final_prompt, system_role, ia_mode, models)
+    except Exception:
+        route_stats.record(prompt_meta.get("id"), ia_mode, models[ia_mode], time.monotonic() - started, input_tokens, error=True)
+        raise
+    route_stats.record(prompt_meta.get("id"), provider, models[provider], time.monotonic() - started,
+                       input_tokens, token_budget.count(models[provider], analysis))
+    return analysis, provider, models[provider]
+
+def stream_ai(final_prompt, prompt_meta, ia_mode="openai"):
+    """Comme call_ai en streaming : retourne (fournisseur, modèle, générateur de la réponse)"""
+    system_role = prompt_meta["system_role"]
+    input_tokens = count_tokens(ia_mode, system_role, final_prompt)
+    models = resolve_models(prompt_meta, input_tokens, route_providers(ia_mode), requested=ia_mode)
+    provider, tokens = provider_router.stream(final_prompt, system_role, ia_mode, models)
+
+    def generate():
+        started = time.monotonic()
+        parts = []
+        try:
+            for content in tokens:
+                parts.append(content)
+                yield content
+        except Exception:
+            route_stats.record(prompt_meta.get("id"), provider, models[provider], time.monotonic() - started,
+                               input_tokens, error=True)
+            raise
+        route_stats.record(prompt_meta.get("id"), provider, models[provider], time.monotonic() - started,
+                           input_tokens, token_budget.count(models[provider], "".join(parts)))
+
+    return provider, models[provider], generate()
+
+def build_analysis_prompt(prompt_content, text):
+    return f"{prompt_content}\n\nContenu du document :\n{text}"
+
+def document_token_budget(prompt_meta, fixed_text, document_tokens, ia_mode="openai"):
+    """Jetons disponibles pour le texte des documents, avec le modèle qui les comptera.
+
+    Le plafond propre au prompt (max_input_tokens) est appliqué avant le choix du modèle :
+    les règles de routage voient la taille du texte réellement envoyé. Le fournisseur
+    secondaire prêt à recevoir la même requête (couverture ou bascule) limite aussi le
+    budget : le prompt doit tenir dans les deux fenêtres de contexte.
+    """
+    prompt_cap = prompt_meta.get("max_input_tokens")
+    if prompt_cap:
+        document_tokens = min(document_tokens, prompt_cap)
+    fixed_text = prompt_meta["system_role"] + fixed_text
+
+    providers = route_providers(ia_mode, ready_only=True)
+    # Aucun téléchargement de modèle pour un simple calcul de budget
+    models = resolve_models(prompt_meta, document_tokens + count_tokens(ia_mode, fixed_text), providers)
+
+    budget = min(
+        token_budget.input_budget(provider, models[provider], fixed_text,
+                                  local_ai.options.get("num_predict") if provider == "local" else None)
+        for provider in providers
+    )
+    return models[ia_mode], min(budget, prompt_cap) if prompt_cap else budget
+
+def max_read_chars(prompt_meta, fixed_text, ia_mode="openai", documents=1):
+    """Caractères à extraire par document, avant la coupe exacte en jetons.
+
+    La taille du texte n'est pas encore connue : le budget retenu est celui du modèle
+    choisi pour les plus grandes entrées, borné par le plafond du prompt, converti avec
+    LLM_READ_CHARS_PER_TOKEN
+    (supérieur au ratio réel, ce qui laisse de la marge).
+    """
+    _, budget = document_token_budget(prompt_meta, fixed_text, sys.maxsize, ia_mode)
+    return max(int(budget * Config.LLM_READ_CHARS_PER_TOKEN) // documents, 1)
+
+def fit_document_text(prompt_meta, prompt_content, text, ia_mode="openai"):
+    """Coupe le texte du document au budget de jetons du prompt"""
+    fixed_text = build_analysis_prompt(prompt_content, "")
+    model, budget = document_token_budget(prompt_meta, fixed_text, count_tokens(ia_mode, text), ia_mode)
+    text, _ = token_budget.truncate(model, text, budget)
+    return text
+
+def get_model_signature(ia_mode="openai"):
+    """Fournisseur, modèle et options d'échantillonnage utilisés pour ce mode"""
+    if ia_mode == "local":
+        return {"provider": "local", "model": local_ai.model, "options": local_ai.options}
+    return {"provider": "openai", "model": Config.OPENAI_MODEL, "options": OPENAI_OPTIONS}
+
+def response_cache_key(file_paths, prompt_id, ia_mode="openai", **analysis_options):
+    """Clé du cache des réponses, ou None si le contenu d'un document n'a pas pu être hashé.
+
+    La clé comprend la version de l'extracteur et, avec l'OCR, l'empreinte de ses
+    réglages : le texte envoyé au modèle en dépend.
+    """
+    prompt_meta = prompt_registry.get_metadata(prompt_id)
+    document_hashes = [unified_file_manager.get_file_hash(path) for path in file_paths]
+    if not prompt_meta or not all(document_hashes):
+        return None
+    return llm_response_cache.make_key(
+        documents=document_hashes,
+        extractor=Config.EXTRACTOR_VERSION,
+        ocr_settings=ocr_engine.get_settings_fingerprint() if analysis_options.get("use_ocr") else None,
+        prompt_id=prompt_id,
+        prompt_hash=prompt_meta.get("content_hash"),
+        system_role=prompt_meta.get("system_role"),
+        max_chars=prompt_meta.get("max_chars"),
+        max_input_tokens=prompt_meta.get("max_input_tokens"),
+        model_routing=prompt_meta.get("model_routing"),
+        token_budget=token_budget.signature(),
+        **get_model_signature(ia_mode),
+        **analysis_options
+    )
+
+def analyse_document_with_text(text, prompt_id, ia_mode="openai", chunked=False):
+    """Analyse un texte avec un prompt.
+
+    Par défaut le texte est coupé au budget de jetons du modèle ; en mode chunked, il est
+    analysé par morceaux de max_chars caractères puis les résultats sont combinés.
+    """
+    prompt_meta, prompt_content = prompt_registry.get(prompt_id)
 
     if not text.strip():
         # Texte vide : on demande confirmation pour OCR
@@ -129,52 +569,117 @@ def analyse_document_with_text(text, prompt_id, ia_mode="openai"):
             "message": "Pas de texte détecté (document scanné ?). Voulez-vous essayer d'extraire le texte avec OCR ?"
         }
 
-    max_chars = prompt_meta.get("max_chars", 4000)
-    final_prompt = f"{prompt_content}\n\nContenu du document :\n{text[:max_chars]}"
+    if ia_mode == "local" and not local_ai.is_available():
+        return {
+            "success": False,
+            "error": "IA locale non disponible. Vérifiez qu'Ollama est installé et en cours d'exécution."
+        }
 
-    # Choisir le mode d'IA
-    if ia_mode == "local":
-        if not local_ai.is_available():
-            return {
-                "success": False,
-                "error": "IA locale non disponible. Vérifiez qu'Ollama est installé et en cours d'exécution."
-            }
-        
-        result = local_ai.analyze_document(final_prompt, prompt_meta["system_role"])
-        if result.get("success"):
-            return result.get("analysis", "")
-        else:
-            raise Exception(result.get("error", "Erreur IA locale"))
+    max_chars = prompt_meta.get("max_chars", 4000)
+    system_role = prompt_meta["system_role"]
+
+    if chunked:
+        model = local_ai.model if ia_mode == "local" else Config.OPENAI_MODEL
+        routing = json.dumps(prompt_meta.get("model_routing"), sort_keys=True)
+        providers, models = set(), set()
+
+        def call_chunk(prompt):
+            analysis, provider, chunk_model = call_ai(prompt, prompt_meta, ia_mode)
+            providers.add(provider)
+            models.add(chunk_model)
+            # Réponse du fournisseur secondaire : elle ne doit pas servir les appels suivants au fournisseur demandé
+            return analysis if provider == ia_mode else UncachedResponse(analysis)
+
+        result = analyze_chunked(
+            text, prompt_content, call_chunk,
+            chunk_chars=max_chars,
+            namespace=f"{ia_mode}:{model}:{routing}\n{system_role}"
+        )
+        # Aucun fournisseur si toutes les parties venaient du cache
+        return {**result, "provider": ",".join(sorted(providers)) or None, "model": ",".join(sorted(models)) or None}
+
+    text = fit_document_text(prompt_meta, prompt_content, text, ia_mode)
+    analysis, provider, model = call_ai(build_analysis_prompt(prompt_content, text), prompt_meta, ia_mode)
+    return {"analysis": analysis, "provider": provider, "model": model}
+
+
+# ---------- Lecture pour un prompt ----------
+def read_document_text(file_path, max_chars, use_ocr=False):
+    """Lit le texte d'un document dans la limite du budget du prompt.
+
+    Retourne (texte, confirmation, avertissement) : la confirmation est demandée
+    lorsque le document n'a aucun texte et que l'OCR n'a pas été autorisé ; un PDF
+    dont seules certaines pages sont scannées est analysé avec sa couche texte et
+    l'avertissement liste les pages ignorées (None sinon).
+    """
+    name = os.path.basename(file_path)
+    warning = None
+
+    if is_pdf(file_path):
+        doc_text, scanned_pages = read_pdf_hybrid(file_path, max_chars, use_ocr)
+        if scanned_pages and doc_text.strip():
+            pages = ", ".join(str(page) for page in scanned_pages)
+            warning = f"Pages scannées non analysées dans {name} (pages {pages}) : relancez avec l'OCR pour les inclure."
     else:
-        # Mode OpenAI par défaut
-        response = call_openai_api(final_prompt, prompt_meta["system_role"])
-        return response.strip()
+        doc_text = read_file(file_path, max_chars=max_chars)
+
+    if not doc_text.strip():
+        if not use_ocr:
+            return doc_text, f"Pas de texte détecté dans {name}. Voulez-vous extraire le texte avec OCR ?", None
+        doc_text = perform_ocr(file_path)[:max_chars]
+
+    return doc_text, None, warning
 
 
 # ---------- Traitement complet ----------
-def process_document(file_path, prompt_id, ia_mode="openai", use_ocr=False):
-    """Traite un document avec l'IA spécifiée"""
+def process_document(file_path, prompt_id, ia_mode="openai", use_ocr=False, chunked=False, use_cache=True):
+    """Traite un document avec l'IA spécifiée (en entier par morceaux si chunked).
+
+    Une analyse identique déjà effectuée est servie par le cache des réponses,
+    sauf si use_cache vaut False.
+    """
     try:
-        # Lire le contenu du fichier
-        doc_text = read_file(file_path)
+        cache_key = response_cache_key([file_path], prompt_id, ia_mode, use_ocr=use_ocr, chunked=chunked) if use_cache else None
+        if cache_key:
+            cached = llm_response_cache.get(cache_key)
+            if cached is not None:
+                return {"success": True, **cached, "ia_mode": ia_mode, "cached": True}
+
+        # Lire uniquement ce que le prompt pourra exploiter
+        prompt_meta, prompt_content = prompt_registry.get(prompt_id)
+        if chunked:
+            budget = Config.CHUNKED_ANALYSIS_MAX_CHARS
+        else:
+            budget = max_read_chars(prompt_meta, build_analysis_prompt(prompt_content, ""), ia_mode)
+        doc_text, confirmation_message, warning = read_document_text(file_path, budget, use_ocr)
         
-        if not doc_text.strip():
-            if not use_ocr:
-                return {
-                    "success": False,
-                    "confirmation_required": True,
-                    "message": "Pas de texte détecté. Voulez-vous extraire le texte avec OCR ?"
-                }
-            doc_text = perform_ocr(file_path)
+        if confirmation_message:
+            return {
+                "success": False,
+                "confirmation_required": True,
+                "message": confirmation_message
+            }
 
         # Analyser avec l'IA
-        result = analyse_document_with_text(doc_text, prompt_id, ia_mode)
-        
-        return {
-            "success": True,
-            "analysis": result,
-            "ia_mode": ia_mode
-        }
+        result = analyse_document_with_text(doc_text, prompt_id, ia_mode, chunked)
+        if "analysis" not in result:
+            return {"success": False, **result}
+
+        if chunked:
+            response = {"analysis": result["analysis"], "chunks": result["chunks"],
+                        "provider": result["provider"], "model": result["model"]}
+            calls = result["chunks"] + result["reduce_calls"]
+        else:
+            response = {"analysis": result["analysis"], "provider": result["provider"], "model": result["model"]}
+            calls = 1
+        if warning:
+            response["warning"] = warning
+        # Pas de cache pour une réponse du secondaire (bascule ou couverture)
+        if cache_key and response["provider"] in (None, ia_mode):
+            tokens = estimate_tokens(doc_text, response["analysis"]) + calls * estimate_tokens(prompt_content)
+            llm_response_cache.set(cache_key, response, tokens, calls)
+
+        return {"success": True, **response, "ia_mode": ia_mode}
 
     except Exception as e:
         return {
@@ -183,25 +688,77 @@ def process_document(file_path, prompt_id, ia_mode="openai", use_ocr=False):
         }
 
 
+# ---------- Traitement en streaming ----------
+def stream_document(file_path, prompt_id, ia_mode="openai", use_ocr=False, use_cache=True):
+    """Analyse un document en générant la réponse de l'IA au fil de l'eau.
+
+    Génère des couples (événement, données) : "token" pour chaque morceau de réponse,
+    puis "done" avec l'analyse complète, ou "confirmation_required" / "error".
+    Le cache des réponses est partagé avec process_document.
+    """
+    cache_key = response_cache_key([file_path], prompt_id, ia_mode, use_ocr=use_ocr, chunked=False) if use_cache else None
+    if cache_key:
+        cached = llm_response_cache.get(cache_key)
+        if cached is not None:
+            yield "token", {"content": cached["analysis"]}
+            yield "done", {"analysis": cached["analysis"], "provider": cached.get("provider"),
+                           "model": cached.get("model"), "warning": cached.get("warning"), "cached": True}
+            return
+
+    prompt_meta, prompt_content = prompt_registry.get(prompt_id)
+    budget = max_read_chars(prompt_meta, build_analysis_prompt(prompt_content, ""), ia_mode)
+    doc_text, confirmation_message, warning = read_document_text(file_path, budget, use_ocr)
+    if confirmation_message:
+        yield "confirmation_required", {"message": confirmation_message}
+        return
+
+    if ia_mode == "local" and not local_ai.is_available():
+        yield "error", {"error": "IA locale non disponible. Vérifiez qu'Ollama est installé et en cours d'exécution."}
+        return
+
+    doc_text = fit_document_text(prompt_meta, prompt_content, doc_text, ia_mode)
+    final_prompt = build_analysis_prompt(prompt_content, doc_text)
+    provider, model, tokens = stream_ai(final_prompt, prompt_meta, ia_mode)
+    parts = []
+    for content in tokens:
+        parts.append(content)
+        yield "token", {"content": content}
+
+    response = {"analysis": "".join(parts).strip(), "provider": provider, "model": model, "warning": warning}
+    if cache_key and provider == ia_mode:
+        llm_response_cache.set(cache_key, response, estimate_tokens(final_prompt, response["analysis"]))
+    yield "done", {**response, "cached": False}
+
+
 # ---------- Traitement multi-documents ----------
-def process_multiple_documents(file_paths, prompt_id, ia_mode="openai", use_ocr=False):
+def process_multiple_documents(file_paths, prompt_id, ia_mode="openai", use_ocr=False, use_cache=True):
     """Traite plusieurs documents avec l'IA pour comparaison"""
     try:
-        # Lire le contenu de tous les fichiers
+        cache_key = response_cache_key(file_paths, prompt_id, ia_mode, use_ocr=use_ocr) if use_cache else None
+        if cache_key:
+            cached = llm_response_cache.get(cache_key)
+            if cached is not None:
+                return {"success": True, **cached, "ia_mode": ia_mode, "cached": True}
+
+        # Charger le prompt
+        prompt_meta, prompt_content = prompt_registry.get(prompt_id)
+        # Lire le contenu de tous les fichiers, le budget de lecture étant partagé entre eux
         documents_content = []
+        warnings = []
+        read_chars = max_read_chars(prompt_meta, prompt_content, ia_mode, len(file_paths))
         
         for file_path in file_paths:
             try:
-                doc_text = read_file(file_path)
+                doc_text, confirmation_message, warning = read_document_text(file_path, read_chars, use_ocr)
                 
-                if not doc_text.strip():
-                    if not use_ocr:
-                        return {
-                            "success": False,
-                            "confirmation_required": True,
-                            "message": f"Pas de texte détecté dans {os.path.basename(file_path)}. Voulez-vous extraire le texte avec OCR ?"
-                        }
-                    doc_text = perform_ocr(file_path)
+                if confirmation_message:
+                    return {
+                        "success": False,
+                        "confirmation_required": True,
+                        "message": confirmation_message
+                    }
+                if warning:
+                    warnings.append(warning)
                 
                 # Ajouter le nom du fichier et son contenu
                 documents_content.append({
@@ -216,64 +773,30 @@ def process_multiple_documents(file_paths, prompt_id, ia_mode="openai", use_ocr=
                     "error": f"Erreur lors de la lecture de {os.path.basename(file_path)}: {str(e)}"
                 }
         
-        # Charger le prompt
-        if not os.path.exists(Config.PROMPTS_JSON):
-            raise FileNotFoundError("Fichier de prompt introuvable")
-
-        with open(Config.PROMPTS_JSON, "r", encoding="utf-8") as f:
-            prompts = json.load(f)
-
-        prompt_meta = next((p for p in prompts if p["id"] == prompt_id), None)
-        if not prompt_meta:
-            raise ValueError(f"Prompt introuvable : {prompt_id}")
-
-        prompt_filename = prompt_meta.get("content_file")
-        if not prompt_filename:
-            raise ValueError("Le champ 'content_file' est manquant")
-
-        prompt_path = os.path.join(Config.PROMPT_CONTENT_DIR, prompt_filename)
-        if not os.path.exists(prompt_path):
-            raise FileNotFoundError(f"Fichier de prompt manquant : {prompt_path}")
-
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            prompt_content = f.read()
+        # Partager le budget de jetons entre les documents, en-têtes et prompt déduits
+        headers = [f"\n--- DOCUMENT {i}: {doc['name']} ---\n" for i, doc in enumerate(documents_content, 1)]
+        fixed_text = f"{prompt_content}\n\n" + "\n".join(headers) + "\n"
+        contents = [doc["content"] for doc in documents_content]
+        model, budget = document_token_budget(prompt_meta, fixed_text, count_tokens(ia_mode, *contents), ia_mode)
+        contents = token_budget.allocate(model, contents, budget)
 
         # Préparer le contenu des documents pour le prompt
-        documents_text = ""
-        for i, doc in enumerate(documents_content, 1):
-            documents_text += f"\n--- DOCUMENT {i}: {doc['name']} ---\n"
-            documents_text += doc['content']
-            documents_text += "\n"
-
-        max_chars = prompt_meta.get("max_chars", 6000)
-        final_prompt = f"{prompt_content}\n\n{documents_text[:max_chars]}"
-
-        # Choisir le mode d'IA
-        if ia_mode == "local":
-            if not local_ai.is_available():
-                return {
-                    "success": False,
-                    "error": "IA locale non disponible. Vérifiez qu'Ollama est installé et en cours d'exécution."
-                }
-            
-            result = local_ai.analyze_document(final_prompt, prompt_meta["system_role"])
-            if result.get("success"):
-                return {
-                    "success": True,
-                    "analysis": result.get("analysis", ""),
-                    "ia_mode": ia_mode
-                }
-            else:
-                raise Exception(result.get("error", "Erreur IA locale"))
-        else:
-            # Mode OpenAI par défaut
-            response = call_openai_api(final_prompt, prompt_meta["system_role"])
+        documents_text = "".join(f"{header}{content}\n" for header, content in zip(headers, contents))
+        final_prompt = f"{prompt_content}\n\n{documents_text}"
+
+        if ia_mode == "local" and not local_ai.is_available():
             return {
-                "success": True,
-                "analysis": response.strip(),
-                "ia_mode": ia_mode
+                "success": False,
+                "error": "IA locale non disponible. Vérifiez qu'Ollama est installé et en cours d'exécution."
             }
 
+        analysis, provider, model = call_ai(final_prompt, prompt_meta, ia_mode)
+        response = {"analysis": analysis, "provider": provider, "model": model, "warning": " ".join(warnings) or None}
+        if cache_key and provider == ia_mode:
+            llm_response_cache.set(cache_key, response, estimate_tokens(final_prompt, analysis))
+
+        return {"success": True, **response, "ia_mode": ia_mode}
+
     except Exception as e:
         return {
             "success": False,
@@ -0,0 +1,117 @@
+"""
+Lecture en flux des fichiers Word (.docx)
+
+Le XML du document est parcouru avec iterparse directement depuis l'archive zip,
+sans construire le modèle objet de python-docx. Les paragraphes et les lignes de
+tableaux sont produits dans l'ordre du document et chaque élément traité est
+libéré aussitôt, ce qui borne la mémoire quelle que soit la taille du fichier.
+Les en-têtes sont placés avant le corps, les notes de bas de page et de fin après.
+"""
+
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+P = f"{W_NS}p"
+T = f"{W_NS}t"
+TAB = f"{W_NS}tab"
+BR = f"{W_NS}br"
+CR = f"{W_NS}cr"
+TBL = f"{W_NS}tbl"
+TR = f"{W_NS}tr"
+TC = f"{W_NS}tc"
+
+# Éléments libérés dès qu'ils ont été traités
+RELEASED_TAGS = {P, TBL, TR, TC, f"{W_NS}footnote", f"{W_NS}endnote", f"{W_NS}sdt"}
+
+HEADER_PART = re.compile(r"^word/header\d*\.xml$")
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    """Texte d'un paragraphe, avec tabulations et sauts de ligne comme python-docx"""
+    parts = []
+    for elem in paragraph.iter():
+        if elem.tag == T:
+            parts.append(elem.text or "")
+        elif elem.tag == TAB:
+            parts.append("\t")
+        elif elem.tag in (BR, CR):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def iter_xml_blocks(stream: IO[bytes]) -> Iterator[str]:
+    """Génère les paragraphes et les lignes de tableaux d'une partie XML Word.
+
+    Les cellules d'une ligne sont séparées par " | " ; un tableau imbriqué est
+    rattaché à la cellule qui le contient.
+    """
+    stack = []
+    cells = []  # Paragraphes de chaque cellule ouverte
+    rows = []   # Cellules de chaque ligne ouverte
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == TR:
+                rows.append([])
+            elif elem.tag == TC:
+                cells.append([])
+            continue
+
+        stack.pop()
+        if elem.tag == P:
+            text = _paragraph_text(elem)
+            if cells:
+                if text.strip():
+                    cells[-1].append(text.strip())
+            else:
+                yield text
+        elif elem.tag == TC:
+            cell_text = " ".join(cells.pop())
+            if rows:
+                rows[-1].append(cell_text)
+        elif elem.tag == TR:
+            row_text = " | ".join(rows.pop())
+            if cells:
+                cells[-1].append(row_text)
+            elif row_text.strip(" |"):
+                yield row_text
+
+        if elem.tag in RELEASED_TAGS:
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def iter_docx_chunks(path: str) -> Iterator[str]:
+    """Génère le texte d'un fichier .docx : en-têtes, corps puis notes"""
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+
+        header_texts = []
+        for name in sorted(n for n in names if HEADER_PART.match(n)):
+            with archive.open(name) as stream:
+                text = "\n".join(block for block in iter_xml_blocks(stream) if block.strip())
+            if text and text not in header_texts:
+                header_texts.append(text)
+        if header_texts:
+            yield "-- En-tête --\n" + "\n".join(header_texts) + "\n\n"
+
+        with archive.open("word/document.xml") as stream:
+            for block in iter_xml_blocks(stream):
+                yield block + "\n"
+
+        for name, title in (("word/footnotes.xml", "Notes de bas de page"), ("word/endnotes.xml", "Notes de fin")):
+            if name not in names:
+                continue
+            with archive.open(name) as stream:
+                notes = [block for block in iter_xml_blocks(stream) if block.strip()]
+            if notes:
+                yield f"\n-- {title} --\n" + "\n".join(notes) + "\n"
+
+
+def read_docx(path: str) -> str:
+    return "".join(iter_docx_chunks(path)).strip()
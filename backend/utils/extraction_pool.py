@@ -0,0 +1,292 @@
+"""
+Pool de processus isolés pour l'extraction de texte et l'OCR
+
+Le parsing des documents (PyMuPDF, openpyxl, Tesseract...) est exécuté hors du
+processus web. Chaque tâche est soumise à un délai maximal et à une limite de
+mémoire résidente : un document pathologique ne fait échouer que lui-même, le
+processus fautif est tué avec ses sous-processus (pdftoppm, Tesseract), qui sont
+comptés dans la limite de mémoire, puis remplacé. Les processus sont aussi recyclés après
+un nombre fixe de tâches pour contenir les fuites mémoire des bibliothèques natives.
+
+Les caches restent dans le processus web : les tâches ne renvoient que du texte.
+"""
+
+import os
+import time
+import signal
+import queue
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from config import Config
+
+try:
+    import psutil
+except ImportError:  # Optionnel : à défaut, /proc est utilisé sous Linux
+    psutil = None
+
+
+class ExtractionError(Exception):
+    """Échec d'une tâche d'extraction (plantage, délai dépassé, mémoire dépassée)"""
+
+
+def _worker_main(conn):
+    """Boucle d'un processus de travail : exécute les tâches reçues jusqu'au signal d'arrêt"""
+    # Groupe de processus dédié : les sous-processus lancés par les tâches en font
+    # partie et peuvent être mesurés et tués avec le processus de travail
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        func, args = message
+        try:
+            conn.send(("ok", func(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def _get_rss(pid: int) -> Optional[int]:
+    """Mémoire résidente d'un processus en octets, ou None si non mesurable"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _group_pids(pgid: int) -> list:
+    """Processus du groupe pgid (processus de travail et ses sous-processus)"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pgid)
+            return [pgid] + [child.pid for child in process.children(recursive=True)]
+        except psutil.Error:
+            return []
+    pids = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return [pgid]
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # Le nom entre parenthèses peut contenir des espaces : lecture après ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[2]) == pgid:
+                pids.append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    return pids
+
+
+def _get_group_rss(pid: int) -> Optional[int]:
+    """Mémoire résidente cumulée d'un processus de travail et de ses sous-processus"""
+    sizes = [rss for rss in map(_get_rss, _group_pids(pid)) if rss is not None]
+    return sum(sizes) if sizes else None
+
+
+def _kill_group(pgid: int):
+    """Tue les processus restants du groupe (sous-processus orphelins compris)"""
+    if not hasattr(os, "killpg"):
+        return
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class _Worker:
+    """Processus de travail et son canal de communication"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        # Démon : arrêté avec le processus web ; ses sous-processus sont tués par _kill_group
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+
+    def stop(self, force: bool = False):
+        if not force:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=2)
+            except (OSError, BrokenPipeError):
+                pass
+        _kill_group(self.process.pid)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=2)
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Pool de processus avec délai, limite mémoire et recyclage par tâche"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_tasks_per_worker: int = 50,
+                 memory_limit_mb: int = 1024, task_timeout: float = 120.0, enabled: bool = True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.task_timeout = task_timeout
+        self.enabled = enabled
+
+        # spawn sur toutes les plateformes : un fork du processus web copierait ses threads
+        # (sondes, préchargement, routeur) et les verrous qu'ils détiennent
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = queue.Queue()
+        self._threads = []
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self.stats = {"completed": 0, "failed": 0, "timeouts": 0, "memory_kills": 0, "recycled": 0}
+
+    def _start_threads(self):
+        with self._lock:
+            if self._threads or self._shutdown:
+                return
+            for slot in range(self.max_workers):
+                thread = threading.Thread(target=self._slot_loop, args=(slot,), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.shutdown)
+
+    def _record(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _slot_loop(self, slot: int):
+        """Boucle d'un emplacement : une tâche à la fois sur son processus dédié"""
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, func, args, timeout = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._execute(slot, func, args, timeout))
+                self._record("completed")
+            except Exception as e:
+                self._record("failed")
+                future.set_exception(e)
+
+        worker = self._workers.pop(slot, None)
+        if worker is not None:
+            worker.stop()
+
+    def _execute(self, slot: int, func: Callable, args: tuple, timeout: float) -> Any:
+        worker = self._workers.get(slot)
+        if worker is None or not worker.process.is_alive():
+            worker = self._workers[slot] = _Worker(self._context)
+
+        try:
+            worker.conn.send((func, args))
+        except (OSError, BrokenPipeError):
+            self._discard(slot, force=True)
+            raise ExtractionError("Processus d'extraction indisponible")
+
+        deadline = time.monotonic() + timeout
+        while not worker.conn.poll(0.1):
+            if not worker.process.is_alive():
+                self._discard(slot, force=True)
+                raise ExtractionError(f"Le processus d'extraction s'est arrêté (code {worker.process.exitcode})")
+            if time.monotonic() > deadline:
+                self._discard(slot, force=True)
+                self._record("timeouts")
+                raise ExtractionError(f"Délai d'extraction dépassé ({timeout:.0f} s)")
+            rss = _get_group_rss(worker.process.pid) if self.memory_limit_bytes else None
+            if rss is not None and rss > self.memory_limit_bytes:
+                self._discard(slot, force=True)
+                self._record("memory_kills")
+                raise ExtractionError(f"Limite mémoire dépassée ({rss // (1024 * 1024)} Mo)")
+
+        try:
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self._discard(slot, force=True)
+            raise ExtractionError("Le processus d'extraction s'est arrêté pendant l'envoi du résultat")
+
+        worker.tasks_done += 1
+        if worker.tasks_done >= self.max_tasks_per_worker:
+            self._discard(slot)
+            self._record("recycled")
+
+        if status == "error":
+            raise ExtractionError(payload)
+        return payload
+
+    def _discard(self, slot: int, force: bool = False):
+        worker = self._workers.pop(slot, None)
+        if worker is not None:
+            worker.stop(force=force)
+
+    def submit(self, func: Callable, *args, timeout: Optional[float] = None) -> Future:
+        """Soumet une fonction (importable au niveau module) et retourne un Future"""
+        future = Future()
+        if not self.enabled:
+            # Exécution dans le processus courant (tests, scripts)
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if self._shutdown:
+            raise RuntimeError("Le pool d'extraction est arrêté")
+        self._start_threads()
+        self._tasks.put((future, func, args, timeout or self.task_timeout))
+        return future
+
+    def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Exécute une fonction dans le pool et attend son résultat"""
+        return self.submit(func, *args, timeout=timeout).result()
+
+    def shutdown(self):
+        """Arrête les emplacements et leurs processus"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._tasks.put(None)
+        for thread in threads:
+            thread.join(timeout=5)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_workers": self.max_workers,
+                "active_workers": len(self._workers),
+                "queued_tasks": self._tasks.qsize(),
+                **self.stats
+            }
+
+
+# Instance globale
+extraction_pool = ExtractionPool(
+    max_workers=Config.EXTRACTION_MAX_WORKERS,
+    max_tasks_per_worker=Config.EXTRACTION_MAX_TASKS_PER_WORKER,
+    memory_limit_mb=Config.EXTRACTION_MEMORY_LIMIT_MB,
+    task_timeout=Config.EXTRACTION_TASK_TIMEOUT,
+    enabled=Config.EXTRACTION_POOL_ENABLED
+)
@@ -87,7 +87,8 @@ class FileRegistry:
         
         return file_id
     
-    def update_file_status(self, file_id: str, status: str, analysis: str = None, error: str = None):
+    def update_file_status(self, file_id: str, status: str, analysis: str = None, error: str = None,
+                           provider: str = None):
         """Met à jour le statut d'un fichier"""
         if file_id not in self.registry:
             raise KeyError(f"Fichier non enregistré: {file_id}")
@@ -100,6 +101,9 @@ class FileRegistry:
         
         if error is not None:
             self.registry[file_id]["error"] = error
+
+        if provider is not None:
+            self.registry[file_id]["provider"] = provider
         
         self._save_registry()
     
@@ -179,11 +183,11 @@ class FileStateManager:
         """Marque un fichier comme en cours d'analyse"""
         return self.move_file_to_state(file_id, "in_progress")
     
-    def complete_analysis(self, file_id: str, analysis: str) -> bool:
-        """Marque un fichier comme analysé avec succès"""
+    def complete_analysis(self, file_id: str, analysis: str, provider: str = None) -> bool:
+        """Marque un fichier comme analysé avec succès (provider : fournisseur d'IA qui a répondu)"""
         success = self.move_file_to_state(file_id, "completed")
         if success:
-            self.registry.update_file_status(file_id, "completed", analysis=analysis)
+            self.registry.update_file_status(file_id, "completed", analysis=analysis, provider=provider)
         return success
     
     def mark_as_failed(self, file_id: str, error: str) -> bool:
@@ -219,6 +223,7 @@ class FileStateManager:
                     "status": file_info["status"],
                     "analysis": file_info.get("analysis"),
                     "error": file_info.get("error"),
+                    "provider": file_info.get("provider"),
                     "file_id": file_id,
                     "method": "registry_exact"
                 }
@@ -237,6 +242,7 @@ class FileStateManager:
                                     "status": file_info["status"],
                                     "analysis": file_info.get("analysis"),
                                     "error": file_info.get("error"),
+                                    "provider": file_info.get("provider"),
                                     "file_id": file_id,
                                     "method": "hash_match"
                                 }
@@ -263,6 +269,7 @@ class FileStateManager:
                                         "status": file_info["status"],
                                         "analysis": file_info.get("analysis"),
                                         "error": file_info.get("error"),
+                                        "provider": file_info.get("provider"),
                                         "file_id": file_id,
                                         "method": "date_hash_match"
                                     }
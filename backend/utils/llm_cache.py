@@ -0,0 +1,71 @@
+"""
+Cache persistant des réponses de l'IA
+
+Une analyse est identifiée par le hash du contenu des documents, l'identifiant et
+le hash du prompt, le rôle système, le fournisseur, le modèle et les options
+d'échantillonnage. Relancer une analyse identique renvoie la réponse enregistrée
+sans appel à OpenAI ni à Ollama. Les jetons économisés sont estimés (≈ 4 caractères
+par jeton) à partir de la taille du prompt et de la réponse.
+"""
+
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+
+from config import Config
+from utils.cache_store import PersistentLRUCache
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts: str) -> int:
+    return sum(len(text) for text in texts if text) // CHARS_PER_TOKEN
+
+
+class LLMResponseCache:
+    """Réponses de l'IA indexées par le hash de tous les paramètres de l'appel"""
+
+    def __init__(self, store: PersistentLRUCache):
+        self.store = store
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "saved_calls": 0, "saved_tokens": 0}
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retourne le résultat enregistré pour cette clé, ou None"""
+        cached = self.store.get(key)
+        with self._lock:
+            if cached is None:
+                self.stats["misses"] += 1
+                return None
+            entry = json.loads(cached)
+            self.stats["hits"] += 1
+            self.stats["saved_calls"] += entry.get("calls", 1)
+            self.stats["saved_tokens"] += entry.get("tokens", 0)
+        return entry["result"]
+
+    def set(self, key: str, result: Dict, tokens: int, calls: int = 1):
+        """Enregistre un résultat et le coût estimé de l'appel qui l'a produit"""
+        self.store.set(key, json.dumps({"result": result, "tokens": tokens, "calls": calls}, ensure_ascii=False))
+
+    def clear(self):
+        self.store.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.store.get_stats(),
+                **self.stats,
+                "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else None
+            }
+
+
+# Instance globale
+llm_response_cache = LLMResponseCache(
+    PersistentLRUCache(Config.LLM_CACHE_DIR, Config.LLM_CACHE_MAX_BYTES, ttl=Config.LLM_CACHE_TTL)
+)
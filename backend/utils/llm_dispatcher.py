@@ -0,0 +1,258 @@
+"""
+Répartiteur central des appels à l'IA
+
+Tous les appels à OpenAI et à Ollama passent par ce répartiteur, qui applique par
+fournisseur :
+- une limite d'appels simultanés ;
+- des seaux à jetons sur les requêtes et les jetons par minute ;
+- de nouvelles tentatives avec attente exponentielle aléatoire, qui respectent
+  l'en-tête Retry-After des réponses 429 / 503.
+Il mesure séparément le temps d'attente (file, limites de débit, tentatives) et
+le temps de service des fournisseurs.
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterator, Optional
+
+from config import Config
+
+# Estimation des jetons de réponse ajoutée à ceux du prompt pour la limite par minute
+COMPLETION_TOKENS_ESTIMATE = 500
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """Erreur temporaire d'un fournisseur ; retry_after en secondes si le serveur l'indique"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Délai demandé par le serveur (retry-after-ms, Retry-After en secondes ou en date HTTP)"""
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def classify_error(error: Exception):
+    """Retourne (tentative possible, délai Retry-After, code HTTP) pour une erreur de fournisseur"""
+    if isinstance(error, RetryableError):
+        return True, error.retry_after, error.status_code
+
+    # Erreurs du SDK OpenAI, reconnues sans l'importer
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        response = getattr(error, "response", None)
+        retry_after = parse_retry_after(getattr(response, "headers", None))
+        return status_code in RETRYABLE_STATUS_CODES, retry_after, status_code
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True, None, None
+    return False, None, None
+
+
+class TokenBucket:
+    """Seau à jetons rechargé en continu ; rate = 0 désactive la limite"""
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 10.0):
+        self.rate = rate_per_minute / 60.0
+        # Rafale maximale : burst_seconds de débit
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Attend que amount jetons soient disponibles ; retourne le temps attendu.
+
+        Une demande plus grande que le seau attend qu'il soit plein puis est débitée
+        en entier : le solde devient négatif et les appels suivants attendent que
+        la dette soit remboursée, ce qui maintient le débit moyen.
+        """
+        if not self.rate:
+            return 0.0
+        required = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= required:
+                    self._tokens -= amount
+                    return waited
+                delay = (required - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class ProviderLimiter:
+    """Limites et métriques d'un fournisseur"""
+
+    def __init__(self, name: str, max_concurrency: int, requests_per_minute: float, tokens_per_minute: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "errors": 0, "retries": 0, "rate_limited": 0, "in_flight": 0, "waiting": 0}
+        self.queue_times = deque(maxlen=500)
+        self.service_times = deque(maxlen=500)
+
+    def count(self, counter: str, delta: int = 1):
+        with self._lock:
+            self.counters[counter] += delta
+
+    def record(self, queue_seconds: float, service_seconds: float):
+        with self._lock:
+            self.queue_times.append(queue_seconds)
+            self.service_times.append(service_seconds)
+
+    @staticmethod
+    def _summary(values) -> Dict:
+        if not values:
+            return {"avg_ms": None, "p95_ms": None}
+        ordered = sorted(values)
+        return {
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1)
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                **self.counters,
+                "queue": self._summary(self.queue_times),
+                "service": self._summary(self.service_times)
+            }
+
+
+class LLMDispatcher:
+    """Applique les limites du fournisseur et les nouvelles tentatives autour d'un appel"""
+
+    def __init__(self, providers: Dict[str, ProviderLimiter], max_retries: int = 4,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.providers = providers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        # Attente exponentielle « full jitter », au moins le délai demandé par le serveur
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+        return delay
+
+    def _acquire(self, limiter: ProviderLimiter, estimated_tokens: int):
+        """Attend les seaux à jetons puis une place libre ; retourne le temps attendu"""
+        start = time.monotonic()
+        limiter.count("waiting")
+        try:
+            limiter.request_bucket.acquire(1)
+            limiter.token_bucket.acquire(estimated_tokens + COMPLETION_TOKENS_ESTIMATE)
+            limiter.semaphore.acquire()
+        finally:
+            limiter.count("waiting", -1)
+        limiter.count("in_flight")
+        return time.monotonic() - start
+
+    def _release(self, limiter: ProviderLimiter):
+        limiter.count("in_flight", -1)
+        limiter.semaphore.release()
+
+    def _handle_failure(self, limiter: ProviderLimiter, error: Exception, attempt: int) -> float:
+        """Retourne le délai avant la prochaine tentative, ou relève l'erreur"""
+        retryable, retry_after, status_code = classify_error(error)
+        if status_code == 429:
+            limiter.count("rate_limited")
+        if not retryable or attempt >= self.max_retries:
+            limiter.count("errors")
+            raise error
+        limiter.count("retries")
+        delay = self._retry_delay(attempt, retry_after)
+        print(f"⚠️ Appel {limiter.name} en échec ({error}), nouvelle tentative dans {delay:.1f} s")
+        return delay
+
+    def call(self, provider: str, func: Callable, *args, estimated_tokens: int = 0):
+        """Exécute func(*args) dans les limites du fournisseur, avec nouvelles tentatives"""
+        limiter = self.providers[provider]
+        limiter.count("calls")
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += self._acquire(limiter, estimated_tokens)
+            started = time.monotonic()
+            try:
+                result = func(*args)
+                limiter.record(waited, time.monotonic() - started)
+                return result
+            except Exception as e:
+                delay = self._handle_failure(limiter, e, attempt)
+            finally:
+                self._release(limiter)
+            time.sleep(delay)
+            waited += delay
+
+    def stream(self, provider: str, func: Callable[..., Iterator[str]], *args, estimated_tokens: int = 0) -> Iterator[str]:
+        """Comme call pour un générateur : la place est tenue pendant tout le flux.
+
+        Une nouvelle tentative n'est possible qu'avant le premier morceau reçu.
+        """
+        limiter = self.providers[provider]
+        limiter.count("calls")
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += self._acquire(limiter, estimated_tokens)
+            started = time.monotonic()
+            received = False
+            try:
+                for content in func(*args):
+                    received = True
+                    yield content
+                limiter.record(waited, time.monotonic() - started)
+                return
+            except Exception as e:
+                if received:
+                    limiter.count("errors")
+                    raise
+                delay = self._handle_failure(limiter, e, attempt)
+            finally:
+                self._release(limiter)
+            time.sleep(delay)
+            waited += delay
+
+    def get_stats(self) -> Dict:
+        return {name: limiter.get_stats() for name, limiter in self.providers.items()}
+
+
+# Instance globale
+llm_dispatcher = LLMDispatcher(
+    {
+        "openai": ProviderLimiter("openai", Config.LLM_OPENAI_MAX_CONCURRENCY,
+                                  Config.LLM_OPENAI_RPM, Config.LLM_OPENAI_TPM),
+        "local": ProviderLimiter("local", Config.LLM_LOCAL_MAX_CONCURRENCY,
+                                 Config.LLM_LOCAL_RPM, Config.LLM_LOCAL_TPM),
+    },
+    max_retries=Config.LLM_MAX_RETRIES,
+    base_delay=Config.LLM_RETRY_BASE_DELAY,
+    max_delay=Config.LLM_RETRY_MAX_DELAY
+)
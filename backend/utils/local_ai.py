@@ -1,62 +1,176 @@
 import os
 import json
+import time
+import threading
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, List, Optional
 from config import Config
+from utils.llm_dispatcher import RETRYABLE_STATUS_CODES, RetryableError, parse_retry_after
+from utils.model_pulls import ModelPullManager
+from utils.token_budget import token_budget
 
 class LocalAI:
     """Classe pour gérer l'IA locale avec Ollama"""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", pool_size: int = 10):
         self.base_url = base_url
+        self.session = self._create_session(pool_size)
         self.model = "llama3.1:8b"  # Modèle léger mais efficace
+        self.options = {"temperature": 0.2, "top_p": 0.9, "num_predict": 2048, "num_ctx": Config.OLLAMA_NUM_CTX}
+        # Durée pendant laquelle Ollama garde le modèle en mémoire après chaque appel
+        self.keep_alive = Config.OLLAMA_KEEP_ALIVE
         self.available_models = []
-        self._check_ollama_status()
+        # Fonctions appelées avec (modèle, durées) après chaque génération
+        self.timing_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        # Téléchargements de modèles en arrière-plan
+        self.pulls = ModelPullManager(self.session, self.base_url, on_complete=self._on_model_pulled)
+
+        # État de santé tenu à jour par un thread de fond : les routes ne lisent que ce cache
+        self._available = False
+        self._checked_at = None
+        self._last_error = None
+        self._consecutive_failures = 0
+        self._next_check_at = None
+        self._health_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._prober = None
     
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        """Session partagée par tous les threads : connexions keep-alive réutilisées.
+
+        Au-delà de pool_size requêtes simultanées, les appels attendent qu'une
+        connexion se libère au lieu d'en ouvrir de nouvelles.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
     def _check_ollama_status(self) -> bool:
-        """Vérifie si Ollama est disponible et récupère les modèles"""
+        """Interroge Ollama et met à jour le statut et la liste des modèles en cache"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                self.available_models = [model['name'] for model in data.get('models', [])]
-                return True
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=Config.OLLAMA_PROBE_TIMEOUT)
+            response.raise_for_status()
+            models = [model['name'] for model in response.json().get('models', [])]
+            error = None
         except Exception as e:
-            print(f"⚠️ Ollama non disponible: {e}")
-            return False
-        return False
+            models = None
+            error = str(e)
+
+        with self._health_lock:
+            if error is None:
+                if not self._available and self._checked_at is not None:
+                    print("✅ Ollama de nouveau disponible")
+                self._available = True
+                self.available_models = models
+                self._consecutive_failures = 0
+                delay = Config.OLLAMA_HEALTH_TTL
+            else:
+                if self._available or self._checked_at is None:
+                    print(f"⚠️ Ollama non disponible: {error}")
+                self._available = False
+                self._consecutive_failures += 1
+                # Attente exponentielle tant qu'Ollama ne répond pas
+                delay = min(Config.OLLAMA_HEALTH_TTL * 2 ** (self._consecutive_failures - 1),
+                            Config.OLLAMA_HEALTH_MAX_BACKOFF)
+            self._last_error = error
+            self._checked_at = time.time()
+            self._next_check_at = self._checked_at + delay
+            return self._available
+
+    def _probe_loop(self):
+        while True:
+            self._check_ollama_status()
+            with self._health_lock:
+                delay = max(self._next_check_at - time.time(), 0)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def start_health_prober(self):
+        """Démarre la surveillance d'Ollama en arrière-plan (une seule fois)"""
+        with self._health_lock:
+            if self._prober is None:
+                self._prober = threading.Thread(target=self._probe_loop, name="ollama-health", daemon=True)
+                self._prober.start()
+
+    def request_health_check(self):
+        """Demande une vérification immédiate, sans l'attendre"""
+        self.start_health_prober()
+        self._wake.set()
     
-    def is_available(self) -> bool:
-        """Vérifie si l'IA locale est disponible"""
-        return self._check_ollama_status()
+    def is_available(self, refresh: bool = False) -> bool:
+        """Statut en cache de l'IA locale ; refresh=True interroge Ollama immédiatement"""
+        self.start_health_prober()
+        if refresh:
+            return self._check_ollama_status()
+        with self._health_lock:
+            return self._available
     
     def get_available_models(self) -> list:
         """Retourne la liste des modèles disponibles"""
         return self.available_models
+
+    def get_health(self) -> Dict[str, Any]:
+        """État de la dernière vérification d'Ollama"""
+        self.start_health_prober()
+        with self._health_lock:
+            return {
+                "available": self._available,
+                "models": list(self.available_models) if self._available else [],
+                "checked_at": datetime.fromtimestamp(self._checked_at).isoformat() if self._checked_at else None,
+                "next_check_in": round(max(self._next_check_at - time.time(), 0), 1) if self._next_check_at else None,
+                "consecutive_failures": self._consecutive_failures,
+                "last_error": self._last_error
+            }
     
     def ensure_model_available(self, model_name: str = None) -> bool:
-        """S'assure que le modèle demandé est disponible, sinon le télécharge"""
+        """Indique si le modèle est disponible ; sinon lance son téléchargement en arrière-plan sans l'attendre.
+
+        Seuls l'état en cache et celui des téléchargements sont consultés : aucun appel
+        à Ollama n'est fait ici, les vérifications sont laissées à la sonde.
+        """
         if model_name is None:
             model_name = self.model
             
         if model_name in self.available_models:
             return True
-            
-        try:
-            print(f"📥 Téléchargement du modèle {model_name}...")
-            response = requests.post(
-                f"{self.base_url}/api/pull",
-                json={"name": model_name},
-                timeout=300  # 5 minutes pour le téléchargement
-            )
-            if response.status_code == 200:
-                self.available_models.append(model_name)
-                print(f"✅ Modèle {model_name} téléchargé avec succès")
-                return True
-        except Exception as e:
-            print(f"❌ Erreur lors du téléchargement du modèle {model_name}: {e}")
+        pull = self.pulls.get(model_name)
+        if pull and pull.is_active:
+            return False
+        if not self.is_available():
             return False
+
+        # Un modèle installé par un « ollama pull » manuel est téléchargé sans délai et
+        # ajouté à la liste en fin de téléchargement
+        self.pulls.start(model_name)
+        self.request_health_check()
         return False
+
+    def start_model_pull(self, model_name: str = None) -> Dict[str, Any]:
+        """Lance le téléchargement d'un modèle (ou retourne celui en cours) et retourne sa progression"""
+        return self.pulls.start(model_name or self.model).get_summary()
+
+    def get_pull_status(self, model_name: str = None) -> Optional[Dict[str, Any]]:
+        pull = self.pulls.get(model_name or self.model)
+        return pull.get_summary() if pull else None
+
+    def _on_model_pulled(self, model_name: str):
+        with self._health_lock:
+            if model_name not in self.available_models:
+                self.available_models = self.available_models + [model_name]
+        self.request_health_check()
+
+    def _unavailable_model_error(self, model_name: str) -> str:
+        pull = self.get_pull_status(model_name)
+        if pull and pull["status"] in ("pending", "running"):
+            return f"Modèle {model_name} en cours de téléchargement ({pull['percent']:.0f} %), réessayez plus tard"
+        if pull and pull["status"] == "failed":
+            return f"Modèle {model_name} non disponible (échec du téléchargement: {pull['error']})"
+        return f"Modèle {model_name} non disponible"
     
     def analyze_document(self, prompt: str, system_role: str, model_name: str = None) -> Dict[str, Any]:
         """Analyse un document avec l'IA locale"""
@@ -66,7 +180,8 @@ class LocalAI:
         if not self.ensure_model_available(model_name):
             return {
                 "success": False,
-                "error": f"Modèle {model_name} non disponible"
+                "error": self._unavailable_model_error(model_name),
+                "pull": self.get_pull_status(model_name)
             }
         
         try:
@@ -76,39 +191,55 @@ class LocalAI:
                 {"role": "user", "content": prompt}
             ]
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/chat",
                 json={
                     "model": model_name,
                     "messages": messages,
                     "stream": False,
-                    "options": {
-                        "temperature": 0.2,
-                        "top_p": 0.9,
-                        "num_predict": 2048
-                    }
+                    "options": self.options,
+                    "keep_alive": self.keep_alive
                 },
-                timeout=120  # 2 minutes pour l'analyse
+                timeout=(Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT)
             )
             
             if response.status_code == 200:
                 data = response.json()
+                timings = self._timings(data)
+                self._publish_timings(model_name, timings)
+                token_budget.record_usage(model_name, system_role + prompt, data.get("prompt_eval_count"), data.get("eval_count"))
                 return {
                     "success": True,
                     "analysis": data.get("message", {}).get("content", "").strip(),
                     "model": model_name,
-                    "usage": data.get("usage", {})
+                    "usage": {
+                        "prompt_tokens": data.get("prompt_eval_count"),
+                        "completion_tokens": data.get("eval_count")
+                    },
+                    "timings": timings
                 }
             else:
+                # 429 / 503 : Ollama est saturé (OLLAMA_MAX_QUEUE), l'appel peut être retenté
                 return {
                     "success": False,
-                    "error": f"Erreur Ollama: {response.status_code}"
+                    "error": f"Erreur Ollama: {response.status_code}",
+                    "status_code": response.status_code,
+                    "retryable": response.status_code in RETRYABLE_STATUS_CODES,
+                    "retry_after": parse_retry_after(response.headers)
                 }
                 
         except requests.exceptions.Timeout:
             return {
                 "success": False,
-                "error": "Timeout lors de l'analyse (plus de 2 minutes)"
+                "error": f"Timeout lors de l'analyse (pas de réponse d'Ollama après {Config.OLLAMA_READ_TIMEOUT:.0f} s)"
+            }
+        except requests.exceptions.ConnectionError as e:
+            # Ollama s'est probablement arrêté : on rafraîchit le statut en arrière-plan
+            self.request_health_check()
+            return {
+                "success": False,
+                "error": f"Erreur lors de l'analyse: {str(e)}",
+                "retryable": True
             }
         except Exception as e:
             return {
@@ -116,16 +247,109 @@ class LocalAI:
                 "error": f"Erreur lors de l'analyse: {str(e)}"
             }
     
+    def stream_analysis(self, prompt: str, system_role: str, model_name: str = None) -> Iterator[str]:
+        """Génère la réponse d'Ollama morceau par morceau (API de chat en streaming).
+
+        Le délai de lecture s'applique entre deux morceaux et non à la réponse entière.
+        """
+        if model_name is None:
+            model_name = self.model
+
+        if not self.ensure_model_available(model_name):
+            raise RuntimeError(self._unavailable_model_error(model_name))
+
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/chat",
+                json={
+                    "model": model_name,
+                    "messages": [
+                        {"role": "system", "content": system_role},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "stream": True,
+                    "options": self.options,
+                    "keep_alive": self.keep_alive
+                },
+                timeout=(Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT),
+                stream=True
+            ) as response:
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise RetryableError(f"Erreur Ollama: {response.status_code}",
+                                         parse_retry_after(response.headers), response.status_code)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Erreur Ollama: {response.status_code}")
+
+                # Une ligne JSON par morceau, la dernière porte "done": true
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Erreur Ollama: {data['error']}")
+                    content = data.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        self._publish_timings(model_name, self._timings(data))
+                        token_budget.record_usage(model_name, system_role + prompt,
+                                                  data.get("prompt_eval_count"), data.get("eval_count"))
+                        break
+        except requests.exceptions.ConnectionError as e:
+            self.request_health_check()
+            raise RetryableError(f"Erreur lors de l'analyse: {str(e)}") from e
+    
+    @staticmethod
+    def _timings(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Durées rapportées par Ollama (en ns), converties en ms : chargement et génération séparés"""
+        def ms(key):
+            return round(data.get(key, 0) / 1e6, 1)
+        return {
+            "load_ms": ms("load_duration"),
+            "prompt_eval_ms": ms("prompt_eval_duration"),
+            "generation_ms": ms("eval_duration"),
+            "total_ms": ms("total_duration")
+        }
+
+    def _publish_timings(self, model_name: str, timings: Dict[str, Any]):
+        for listener in self.timing_listeners:
+            try:
+                listener(model_name, timings)
+            except Exception as e:
+                print(f"⚠️ Erreur lors de l'enregistrement des durées: {e}")
+
+    def load_model(self, model_name: str = None) -> Dict[str, Any]:
+        """Charge le modèle en mémoire sans rien générer (requête sans prompt) et retourne les durées.
+
+        Le contexte demandé doit être celui des analyses : sinon Ollama recharge le modèle
+        avec le bon num_ctx à la première requête.
+        """
+        if model_name is None:
+            model_name = self.model
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json={"model": model_name, "keep_alive": self.keep_alive, "options": {"num_ctx": self.options["num_ctx"]}},
+            timeout=(Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT)
+        )
+        response.raise_for_status()
+        return self._timings(response.json())
+
+    def get_loaded_models(self) -> Dict[str, Dict[str, Any]]:
+        """Modèles actuellement en mémoire dans Ollama (/api/ps), indexés par nom"""
+        response = self.session.get(f"{self.base_url}/api/ps", timeout=Config.OLLAMA_PROBE_TIMEOUT)
+        response.raise_for_status()
+        return {model["name"]: model for model in response.json().get("models", [])}
+
     def get_model_info(self, model_name: str = None) -> Dict[str, Any]:
         """Récupère les informations sur un modèle"""
         if model_name is None:
             model_name = self.model
             
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/show",
                 json={"name": model_name},
-                timeout=10
+                timeout=(Config.OLLAMA_CONNECT_TIMEOUT, 10)
             )
             if response.status_code == 200:
                 return response.json()
@@ -135,4 +359,4 @@ class LocalAI:
         return {}
 
 # Instance globale
-local_ai = LocalAI() 
\ No newline at end of file
+local_ai = LocalAI(Config.OLLAMA_BASE_URL, pool_size=Config.OLLAMA_POOL_SIZE) 
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Cycle de vie du modèle local (Ollama)
+
+Le modèle configuré est chargé en mémoire au démarrage par une requête sans prompt,
+puis surveillé via /api/ps : s'il a été déchargé après une période d'inactivité, il
+est rechargé en arrière-plan. Le premier appel d'analyse ne paie donc plus le temps
+de chargement. Les durées de chargement et de génération rapportées par Ollama sont
+suivies séparément pour distinguer les démarrages à froid du temps de réponse.
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict
+
+from config import Config
+from utils.local_ai import LocalAI, local_ai
+
+# Au-delà de cette durée de chargement, un appel est compté comme démarrage à froid
+COLD_START_MS = 1000
+
+
+class ModelLifecycleManager:
+    """Préchargement, maintien en mémoire et durées du modèle local"""
+
+    def __init__(self, ai: LocalAI, check_interval: float = 60.0, rewarm: bool = True):
+        self.ai = ai
+        self.check_interval = check_interval
+        self.rewarm = rewarm
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.loaded = {}
+        self.stats = {"warmups": 0, "warmup_failures": 0, "calls": 0, "cold_starts": 0}
+        self.last_warmup = None
+        self.load_times = deque(maxlen=200)
+        self.generation_times = deque(maxlen=200)
+
+        ai.timing_listeners.append(self.record_timings)
+
+    def warm_up(self, model_name: str = None) -> bool:
+        """Charge le modèle dans Ollama ; retourne False en cas d'échec"""
+        model_name = model_name or self.ai.model
+        started = time.monotonic()
+        try:
+            timings = self.ai.load_model(model_name)
+        except Exception as e:
+            with self._lock:
+                self.stats["warmup_failures"] += 1
+            print(f"⚠️ Préchargement du modèle {model_name} impossible: {e}")
+            return False
+
+        elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+        with self._lock:
+            self.stats["warmups"] += 1
+            self.last_warmup = {
+                "model": model_name,
+                "at": datetime.now().isoformat(),
+                "load_ms": timings["load_ms"],
+                "elapsed_ms": elapsed_ms
+            }
+        print(f"🔥 Modèle {model_name} chargé en {elapsed_ms / 1000:.1f} s")
+        return True
+
+    def check(self):
+        """Met à jour l'état du modèle et le recharge s'il a été déchargé"""
+        if not self.ai.is_available():
+            return
+        model_name = self.ai.model
+        try:
+            loaded = self.ai.get_loaded_models()
+        except Exception as e:
+            print(f"⚠️ Impossible de lister les modèles chargés: {e}")
+            return
+
+        with self._lock:
+            self.loaded = {
+                name: {"expires_at": model.get("expires_at"), "size_vram": model.get("size_vram")}
+                for name, model in loaded.items()
+            }
+        # Seul un modèle déjà téléchargé est rechargé : le préchargement ne doit pas lancer de téléchargement
+        if self.rewarm and model_name not in loaded and model_name in self.ai.get_available_models():
+            self.warm_up(model_name)
+
+    def _loop(self):
+        # Premier contrôle dès que le statut d'Ollama est connu
+        self.ai.is_available(refresh=True)
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Erreur de surveillance du modèle local: {e}")
+            self._stop.wait(self.check_interval)
+
+    def start(self):
+        """Démarre le préchargement et la surveillance en arrière-plan (une seule fois)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="ollama-lifecycle", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def record_timings(self, model_name: str, timings: Dict[str, Any]):
+        """Enregistre les durées d'une génération (appelée par LocalAI)"""
+        with self._lock:
+            self.stats["calls"] += 1
+            if timings["load_ms"] >= COLD_START_MS:
+                self.stats["cold_starts"] += 1
+            self.load_times.append(timings["load_ms"])
+            self.generation_times.append(timings["prompt_eval_ms"] + timings["generation_ms"])
+
+    @staticmethod
+    def _average(values) -> Any:
+        return round(sum(values) / len(values), 1) if values else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.ai.model,
+                "keep_alive": self.ai.keep_alive,
+                "rewarm": self.rewarm,
+                "loaded_models": dict(self.loaded),
+                **self.stats,
+                "last_warmup": self.last_warmup,
+                "avg_load_ms": self._average(self.load_times),
+                "avg_generation_ms": self._average(self.generation_times)
+            }
+
+
+# Instance globale
+model_lifecycle = ModelLifecycleManager(
+    local_ai,
+    check_interval=Config.OLLAMA_WARMUP_CHECK_INTERVAL,
+    rewarm=Config.OLLAMA_REWARM
+)
@@ -0,0 +1,132 @@
+"""
+Téléchargements de modèles Ollama en arrière-plan
+
+Un téléchargement (POST /api/pull en streaming) est exécuté dans un thread dédié,
+au plus un par modèle. Ollama envoie une ligne JSON par étape ; les octets reçus de
+chaque couche (digest) sont additionnés pour calculer le pourcentage, consultable
+pendant le téléchargement. Aucune requête HTTP ne reste bloquée pendant le pull.
+"""
+
+import json
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from config import Config
+
+
+class ModelPull:
+    """Téléchargement d'un modèle et sa progression"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.status = "pending"  # pending, running, completed, failed
+        self.step = None  # Dernière étape rapportée par Ollama
+        self.error = None
+        self.started_at = datetime.now().isoformat()
+        self.finished_at = None
+        self._layers: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, data: Dict):
+        with self._lock:
+            self.step = data.get("status", self.step)
+            if data.get("digest") and data.get("total"):
+                self._layers[data["digest"]] = {"total": data["total"], "completed": data.get("completed", 0)}
+
+    def finish(self, error: Optional[str] = None):
+        with self._lock:
+            self.status = "failed" if error else "completed"
+            self.error = error
+            self.finished_at = datetime.now().isoformat()
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def get_summary(self) -> Dict:
+        with self._lock:
+            total = sum(layer["total"] for layer in self._layers.values())
+            completed = sum(layer["completed"] for layer in self._layers.values())
+            if self.status == "completed":
+                percent = 100.0
+            else:
+                percent = round(completed / total * 100, 1) if total else 0.0
+            return {
+                "model": self.model_name,
+                "status": self.status,
+                "step": self.step,
+                "percent": percent,
+                "completed_bytes": completed,
+                "total_bytes": total,
+                "error": self.error,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+
+class ModelPullManager:
+    """Lance et suit les téléchargements de modèles ; on_complete(model) est appelé en cas de succès"""
+
+    def __init__(self, session: requests.Session, base_url: str, on_complete: Callable[[str], None] = None):
+        self.session = session
+        self.base_url = base_url
+        self.on_complete = on_complete
+        self._pulls: Dict[str, ModelPull] = {}
+        self._lock = threading.Lock()
+
+    def start(self, model_name: str) -> ModelPull:
+        """Démarre le téléchargement du modèle, ou retourne celui déjà en cours"""
+        with self._lock:
+            pull = self._pulls.get(model_name)
+            if pull and pull.is_active:
+                return pull
+            pull = ModelPull(model_name)
+            self._pulls[model_name] = pull
+
+        threading.Thread(target=self._run, args=(pull,), name=f"ollama-pull-{model_name}", daemon=True).start()
+        return pull
+
+    def _run(self, pull: ModelPull):
+        pull.status = "running"
+        print(f"📥 Téléchargement du modèle {pull.model_name}...")
+        try:
+            # Le délai de lecture s'applique entre deux lignes de progression, pas au téléchargement entier
+            with self.session.post(
+                f"{self.base_url}/api/pull",
+                json={"name": pull.model_name, "stream": True},
+                timeout=(Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_PULL_TIMEOUT),
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(data["error"])
+                    pull.update(data)
+                    if data.get("status") == "success":
+                        break
+                else:
+                    raise RuntimeError("Téléchargement interrompu avant la fin")
+        except Exception as e:
+            pull.finish(str(e))
+            print(f"❌ Erreur lors du téléchargement du modèle {pull.model_name}: {e}")
+            return
+
+        pull.finish()
+        print(f"✅ Modèle {pull.model_name} téléchargé avec succès")
+        if self.on_complete:
+            self.on_complete(pull.model_name)
+
+    def get(self, model_name: str) -> Optional[ModelPull]:
+        with self._lock:
+            return self._pulls.get(model_name)
+
+    def list_pulls(self) -> List[Dict]:
+        with self._lock:
+            pulls = list(self._pulls.values())
+        return [pull.get_summary() for pull in pulls]
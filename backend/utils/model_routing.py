@@ -0,0 +1,127 @@
+"""
+Choix du modèle selon le prompt et la taille de l'entrée
+
+Un prompt peut déclarer dans prompts_list.json des règles « model_routing » par
+fournisseur, par exemple un petit modèle pour la classification et un modèle plus
+grand au-delà d'un certain nombre de jetons en entrée :
+
+    "model_routing": {
+        "openai": [{"model": "gpt-4o-mini"}, {"min_input_tokens": 3000, "model": "gpt-4o"}],
+        "local": [{"model": "llama3.2:3b"}, {"min_input_tokens": 1500, "model": "llama3.1:8b"}]
+    }
+
+La règle retenue est celle de seuil le plus élevé atteint par l'entrée ; sans règle,
+le modèle par défaut du fournisseur est utilisé. Un modèle local absent n'est
+téléchargé que lorsque l'IA locale est le fournisseur demandé. La latence, les jetons et le coût
+estimé de chaque route (prompt, fournisseur, modèle) sont suivis pour ajuster les règles.
+"""
+
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import Config
+from utils.local_ai import local_ai
+
+# Prix indicatifs en dollars par million de jetons (entrée, sortie) ; LLM_MODEL_PRICES les complète
+MODEL_PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+MODEL_PRICES.update({model: tuple(prices) for model, prices in json.loads(Config.LLM_MODEL_PRICES or "{}").items()})
+
+
+def default_model(provider: str) -> str:
+    return local_ai.model if provider == "local" else Config.OPENAI_MODEL
+
+def resolve_model(prompt_meta: Optional[Dict], provider: str, input_tokens: int, start_pull: bool = False) -> str:
+    """Modèle à utiliser pour ce prompt, ce fournisseur et cette taille d'entrée.
+
+    start_pull lance le téléchargement en arrière-plan d'un modèle local absent.
+    """
+    rules = ((prompt_meta or {}).get("model_routing") or {}).get(provider) or []
+    model = default_model(provider)
+    threshold = -1
+    for rule in rules:
+        min_tokens = rule.get("min_input_tokens", 0)
+        if min_tokens <= input_tokens and min_tokens > threshold:
+            model, threshold = rule["model"], min_tokens
+
+    # Modèle local pas encore téléchargé : le modèle par défaut répond pendant son téléchargement
+    if provider == "local" and model != local_ai.model and model not in local_ai.get_available_models():
+        if start_pull and local_ai.is_available() and local_ai.get_pull_status(model) is None:
+            local_ai.start_model_pull(model)
+        return local_ai.model
+    return model
+
+def resolve_models(prompt_meta: Optional[Dict], input_tokens: int, providers: List[str],
+                   requested: Optional[str] = None) -> Dict[str, str]:
+    """Modèles des fournisseurs pouvant recevoir l'appel ; seul le fournisseur requested
+    peut déclencher un téléchargement (aucun pour un simple calcul de budget)"""
+    return {provider: resolve_model(prompt_meta, provider, input_tokens, provider == requested) for provider in providers}
+
+
+class RouteStats:
+    """Appels, latence, jetons et coût estimé par route (prompt, fournisseur, modèle)"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._routes: Dict[tuple, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, prompt_id: Optional[str], provider: str, model: str, seconds: float,
+               input_tokens: int, output_tokens: int = 0, error: bool = False):
+        key = (prompt_id or "-", provider, model)
+        with self._lock:
+            route = self._routes.setdefault(key, {
+                "calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0,
+                "latencies": deque(maxlen=self.window)
+            })
+            route["calls"] += 1
+            if error:
+                route["errors"] += 1
+                return
+            route["input_tokens"] += input_tokens
+            route["output_tokens"] += output_tokens
+            route["latencies"].append(seconds)
+
+    @staticmethod
+    def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+        """Coût en dollars, None si le prix du modèle est inconnu"""
+        prices = MODEL_PRICES.get(model)
+        if prices is None:
+            return None
+        return round((input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000, 6)
+
+    def get_stats(self):
+        with self._lock:
+            routes = [(key, dict(route), sorted(route["latencies"])) for key, route in self._routes.items()]
+
+        result = []
+        for (prompt_id, provider, model), route, latencies in routes:
+            cost = 0.0 if provider == "local" else self.estimate_cost(model, route["input_tokens"], route["output_tokens"])
+            successes = route["calls"] - route["errors"]
+            result.append({
+                "prompt_id": prompt_id,
+                "provider": provider,
+                "model": model,
+                "calls": route["calls"],
+                "errors": route["errors"],
+                "avg_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None,
+                "input_tokens": route["input_tokens"],
+                "output_tokens": route["output_tokens"],
+                "estimated_cost_usd": cost,
+                "cost_per_call_usd": round(cost / successes, 5) if cost is not None and successes else None
+            })
+        return sorted(result, key=lambda r: (r["prompt_id"], r["provider"], r["model"]))
+
+
+# Instance globale
+route_stats = RouteStats()
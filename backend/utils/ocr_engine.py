@@ -0,0 +1,258 @@
+"""
+Moteur OCR parallèle par pages
+
+Les PDF scannés sont rendus par petites fenêtres de pages (first_page/last_page)
+directement dans les processus du pool d'extraction, puis passés à Tesseract. Le nombre
+de pages rendues simultanément est borné pour maîtriser la mémoire, et les
+résultats sont restitués dans l'ordre des pages. Le texte de chaque page est
+conservé dans un cache persistant, invalidé lorsque les réglages OCR changent.
+"""
+
+import os
+import json
+import hashlib
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from config import Config
+from utils.cache_store import PersistentLRUCache
+from utils.unified_file_manager import unified_file_manager
+from utils.extraction_pool import ExtractionPool, extraction_pool
+
+# À incrémenter à chaque changement du pipeline OCR pour invalider le cache
+OCR_ENGINE_VERSION = "1"
+
+
+def _ocr_page_window(path: str, first_page: int, last_page: int, lang: str, dpi: int,
+                     poppler_path: Optional[str], timeout: Optional[float] = None) -> List[str]:
+    """Rend et OCRise une fenêtre de pages dans un processus de travail.
+
+    pdftoppm et Tesseract sont des sous-processus : le délai leur est transmis pour
+    qu'ils ne survivent pas à la tâche.
+    """
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(
+        path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        poppler_path=poppler_path,
+        timeout=timeout
+    )
+    texts = []
+    try:
+        for img in images:
+            texts.append(pytesseract.image_to_string(img, lang=lang, timeout=timeout or 0))
+    finally:
+        for img in images:
+            img.close()
+    return texts
+
+
+def _ocr_image_file(path: str, lang: str, timeout: Optional[float] = None) -> str:
+    """OCRise une image dans un processus de travail"""
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return pytesseract.image_to_string(img, lang=lang, timeout=timeout or 0).strip()
+
+
+def _pdf_page_count(path: str) -> int:
+    import fitz
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+class OCREngine:
+    """OCR des PDF page par page sur le pool d'extraction"""
+
+    def __init__(self, executor: ExtractionPool, lang: str = "fra", dpi: int = 200, window_size: int = 2,
+                 max_pages_in_flight: Optional[int] = None, cache: Optional[PersistentLRUCache] = None,
+                 page_timeout: Optional[float] = None):
+        self.executor = executor
+        self.lang = lang
+        self.dpi = dpi
+        self.window_size = max(1, window_size)
+        self.max_pages_in_flight = max_pages_in_flight or executor.max_workers * self.window_size
+        self.cache = cache
+        # Délai de pdftoppm et de Tesseract pour une page
+        self.page_timeout = page_timeout
+        self._settings_fingerprint = None
+        self._settings_checked = False
+
+    def get_settings_fingerprint(self) -> str:
+        """Empreinte des réglages qui influencent le texte produit par l'OCR"""
+        if self._settings_fingerprint is None:
+            try:
+                import pytesseract
+                tesseract_version = str(pytesseract.get_tesseract_version())
+            except Exception:
+                tesseract_version = "unknown"
+            settings = f"{OCR_ENGINE_VERSION}:{self.lang}:{self.dpi}:{tesseract_version}"
+            self._settings_fingerprint = hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+        return self._settings_fingerprint
+
+    def _cache_key(self, doc_hash: str, page: int) -> str:
+        return f"{doc_hash}:{page}:{self.get_settings_fingerprint()}"
+
+    def _check_settings(self):
+        """Purge le cache si les réglages OCR ont changé depuis la dernière utilisation"""
+        if self._settings_checked:
+            return
+        fingerprint = self.get_settings_fingerprint()
+        settings_file = os.path.join(self.cache.directory, "settings.json")
+
+        previous_fingerprint = None
+        if os.path.exists(settings_file):
+            try:
+                with open(settings_file, 'r', encoding='utf-8') as f:
+                    previous_fingerprint = json.load(f).get("fingerprint")
+            except (json.JSONDecodeError, IOError):
+                previous_fingerprint = None
+
+        if previous_fingerprint != fingerprint:
+            purged = self.cache.delete_matching(lambda key: not key.endswith(f":{fingerprint}"))
+            if purged:
+                print(f"🧹 Réglages OCR modifiés : {purged} pages invalidées dans le cache")
+            try:
+                with open(settings_file, 'w', encoding='utf-8') as f:
+                    json.dump({"fingerprint": fingerprint, "lang": self.lang, "dpi": self.dpi}, f)
+            except IOError as e:
+                print(f"Erreur lors de la sauvegarde des réglages OCR: {e}")
+        self._settings_checked = True
+
+    def invalidate(self, path: Optional[str] = None) -> int:
+        """Supprime du cache les pages d'un document, ou tout le cache sans argument"""
+        if self.cache is None:
+            return 0
+        if path is None:
+            count = self.cache.get_stats()["entries"]
+            self.cache.clear()
+            return count
+        doc_hash = unified_file_manager.get_file_hash(path)
+        return self.cache.delete_matching(lambda key: key.startswith(f"{doc_hash}:"))
+
+    @staticmethod
+    def _check_poppler():
+        if Config.POPPLER_PATH and not os.path.exists(Config.POPPLER_PATH):
+            raise FileNotFoundError(f"Poppler non trouvé au chemin {Config.POPPLER_PATH}. Vérifiez le .env.")
+
+    def get_page_count(self, path: str) -> int:
+        return self.executor.run(_pdf_page_count, path)
+
+    def _windows(self, pages: List[int]) -> List[Tuple[int, int]]:
+        """Regroupe des numéros de pages (1-indexés) en fenêtres contiguës"""
+        windows = []
+        for page in pages:
+            if windows and page == windows[-1][1] + 1 and page - windows[-1][0] < self.window_size:
+                windows[-1] = (windows[-1][0], page)
+            else:
+                windows.append((page, page))
+        return windows
+
+    def _ocr_pages(self, path: str, pages: List[int]) -> Iterator[Tuple[int, str]]:
+        """OCRise les pages demandées sur le pool, sans passer par le cache"""
+        windows = self._windows(pages)
+        max_windows_in_flight = max(1, self.max_pages_in_flight // self.window_size)
+
+        pending = deque()
+        next_window = 0
+        try:
+            while next_window < len(windows) or pending:
+                # Soumettre de nouvelles fenêtres tant que la limite n'est pas atteinte
+                while next_window < len(windows) and len(pending) < max_windows_in_flight:
+                    first_page, last_page = windows[next_window]
+                    future = self.executor.submit(
+                        _ocr_page_window, path, first_page, last_page,
+                        self.lang, self.dpi, Config.POPPLER_PATH, self.page_timeout
+                    )
+                    pending.append((first_page, future))
+                    next_window += 1
+
+                # Restituer la plus ancienne fenêtre pour conserver l'ordre des pages
+                first_page, future = pending.popleft()
+                for offset, text in enumerate(future.result()):
+                    yield first_page + offset, text
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def iter_pdf_pages(self, path: str, pages: Optional[List[int]] = None) -> Iterator[Tuple[int, str]]:
+        """Génère (numéro de page, texte OCR) dans l'ordre des pages.
+
+        Les pages sont 1-indexées ; sans liste explicite, tout le document est traité.
+        Les pages déjà présentes dans le cache ne sont ni rendues ni OCRisées.
+        """
+        self._check_poppler()
+        if pages is None:
+            pages = list(range(1, self.get_page_count(path) + 1))
+        pages = sorted(set(pages))
+
+        doc_hash = unified_file_manager.get_file_hash(path) if self.cache is not None else ""
+        if not doc_hash:
+            yield from self._ocr_pages(path, pages)
+            return
+
+        self._check_settings()
+        missing_pages = [page for page in pages if not self.cache.contains(self._cache_key(doc_hash, page))]
+        missing_set = set(missing_pages)
+        ocr_results = self._ocr_pages(path, missing_pages)
+        try:
+            for page in pages:
+                cache_key = self._cache_key(doc_hash, page)
+                if page not in missing_set:
+                    text = self.cache.get(cache_key)
+                    if text is not None:
+                        yield page, text
+                        continue
+                    # Entrée évincée entre-temps : OCR direct de cette page
+                    text = self.executor.run(
+                        _ocr_page_window, path, page, page, self.lang, self.dpi, Config.POPPLER_PATH
+                    )[0]
+                else:
+                    _, text = next(ocr_results)
+                self.cache.set(cache_key, text)
+                yield page, text
+        finally:
+            ocr_results.close()
+
+    def ocr_pdf(self, path: str, pages: Optional[List[int]] = None) -> str:
+        """OCRise un PDF et retourne le texte des pages concaténé"""
+        return "".join(text + "\n" for _, text in self.iter_pdf_pages(path, pages)).strip()
+
+    def ocr_image(self, path: str) -> str:
+        """OCRise une image isolée"""
+        doc_hash = unified_file_manager.get_file_hash(path) if self.cache is not None else ""
+        if doc_hash:
+            self._check_settings()
+            cached_text = self.cache.get(self._cache_key(doc_hash, 1))
+            if cached_text is not None:
+                return cached_text
+
+        text = self.executor.run(_ocr_image_file, path, self.lang, self.page_timeout)
+
+        if doc_hash:
+            self.cache.set(self._cache_key(doc_hash, 1), text)
+        return text
+
+    def ocr_file(self, path: str) -> str:
+        """OCRise un PDF ou une image selon l'extension"""
+        ext = path.rsplit(".", 1)[1].lower()
+        if ext == "pdf":
+            return self.ocr_pdf(path)
+        return self.ocr_image(path)
+
+
+# Instance globale
+ocr_engine = OCREngine(
+    extraction_pool,
+    lang=Config.OCR_LANG,
+    dpi=Config.OCR_DPI,
+    window_size=Config.OCR_WINDOW_SIZE,
+    max_pages_in_flight=Config.OCR_MAX_PAGES_IN_FLIGHT,
+    cache=PersistentLRUCache(Config.OCR_CACHE_DIR, Config.OCR_CACHE_MAX_BYTES),
+    page_timeout=Config.OCR_PAGE_TIMEOUT
+)
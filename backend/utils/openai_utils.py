@@ -1,70 +1,83 @@
-import os
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
-from docx import Document
-import fitz
-import email
-from email import policy
-import pandas as pd
+"""
+Client OpenAI partagé
+
+Le client n'est créé qu'au premier appel : un déploiement en IA locale seule
+n'importe jamais le SDK OpenAI et démarre sans clé API. Une fois créé, le client
+est réutilisé par tout le processus avec un pool de connexions HTTP keep-alive,
+un délai et une politique de nouvelles tentatives configurables.
+"""
+
+import threading
 from config import Config
+from utils.token_budget import token_budget
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("Clé API OpenAI manquante. Vérifiez .env")
+# Options d'échantillonnage des appels (incluses dans les clés du cache des réponses)
+OPENAI_OPTIONS = {"temperature": 0.2}
 
-client = OpenAI(api_key=api_key)
+_client = None
+_client_lock = threading.Lock()
 
-with open(Config.PROMPTS_JSON, "r", encoding="utf-8") as f:
-    PROMPTS_CATALOG = json.load(f)
 
-def read_docx(path):
-    doc = Document(path)
-    return "\n".join([p.text for p in doc.paragraphs]).strip()
+def get_openai_client():
+    """Retourne le client OpenAI du processus, créé au premier appel"""
+    global _client
+    if _client is not None:
+        return _client
 
-def read_pdf(path):
-    doc = fitz.open(path)
-    return "".join(page.get_text() for page in doc).strip()
+    with _client_lock:
+        if _client is None:
+            if not Config.OPENAI_API_KEY:
+                raise ValueError("Clé API OpenAI manquante. Vérifiez .env")
 
-def read_eml(path):
-    with open(path, "rb") as f:
-        msg = email.message_from_binary_file(f, policy=policy.default)
-    if msg.is_multipart():
-        parts = [p.get_content() for p in msg.walk() if p.get_content_type() == "text/plain"]
-        return "\n".join(parts).strip()
-    return msg.get_content().strip()
+            import httpx
+            from openai import OpenAI
 
-def read_txt(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read().strip()
+            http_client = httpx.Client(limits=httpx.Limits(
+                max_connections=Config.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY
+            ))
+            # Le délai est appliqué par le SDK à chaque requête
+            _client = OpenAI(
+                api_key=Config.OPENAI_API_KEY,
+                http_client=http_client,
+                timeout=httpx.Timeout(Config.OPENAI_TIMEOUT, connect=Config.OPENAI_CONNECT_TIMEOUT),
+                max_retries=Config.OPENAI_MAX_RETRIES
+            )
+    return _client
 
-def read_excel(path):
-    xls = pd.ExcelFile(path)
-    text = ""
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name=sheet)
-        text += f"\n-- Feuille: {sheet} --\n"
-        text += df.fillna('').astype(str).agg(' '.join, axis=1).str.cat(sep='\n')
-    return text.strip()
+def _messages(prompt_text, system_role):
+    return [
+        {"role": "system", "content": system_role},
+        {"role": "user", "content": prompt_text}
+    ]
 
-def read_file(path):
-    ext = path.rsplit(".", 1)[1].lower()
-    match ext:
-        case "pdf": return read_pdf(path)
-        case "doc" | "docx": return read_docx(path)
-        case "eml": return read_eml(path)
-        case "txt": return read_txt(path)
-        case "xls" | "xlsx": return read_excel(path)
-        case _: raise ValueError(f"Type de fichier non supporté : .{ext}")
+def call_openai_api(prompt_text, system_role, model=None):
+    model = model or Config.OPENAI_MODEL
+    response = get_openai_client().chat.completions.create(
+        model=model,
+        messages=_messages(prompt_text, system_role),
+        **OPENAI_OPTIONS
+    )
+    if response.usage:
+        token_budget.record_usage(model, system_role + prompt_text,
+                                  response.usage.prompt_tokens, response.usage.completion_tokens)
+    return response.choices[0].message.content.strip()
 
-def call_openai_api(prompt_text, system_role):
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": system_role},
-            {"role": "user", "content": prompt_text}
-        ],
-        temperature=0.2
+def stream_openai_api(prompt_text, system_role, model=None):
+    """Génère la réponse d'OpenAI morceau par morceau, au fil de sa production"""
+    model = model or Config.OPENAI_MODEL
+    stream = get_openai_client().chat.completions.create(
+        model=model,
+        messages=_messages(prompt_text, system_role),
+        stream=True,
+        # Le dernier morceau, sans contenu, porte les jetons consommés
+        stream_options={"include_usage": True},
+        **OPENAI_OPTIONS
     )
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if chunk.usage:
+            token_budget.record_usage(model, system_role + prompt_text,
+                                      chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
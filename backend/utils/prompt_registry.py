@@ -0,0 +1,132 @@
+"""
+Registre des prompts en mémoire
+
+Le catalogue prompts_list.json et le contenu des fichiers de prompt sont chargés
+une seule fois, indexés par identifiant, puis rechargés uniquement lorsque la date
+de modification de l'un des fichiers change. Chaque prompt expose un hash de son
+contenu, utilisable comme clé de cache.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+
+class PromptRegistry:
+    """Catalogue des prompts indexé par id, rechargé quand les fichiers changent"""
+
+    def __init__(self, catalog_path: str, content_dir: str, check_interval: float = 1.0):
+        self.catalog_path = catalog_path
+        self.content_dir = content_dir
+        # Délai minimal entre deux vérifications des dates de modification
+        self.check_interval = check_interval
+
+        self._prompts: List[Dict] = []
+        self._by_id: Dict[str, Dict] = {}
+        self._contents: Dict[str, Optional[str]] = {}
+        self._fingerprint = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _mtime(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _current_fingerprint(self, prompts: List[Dict]) -> tuple:
+        """Dates de modification du catalogue et des fichiers de contenu"""
+        content_files = sorted({p.get("content_file") for p in prompts if p.get("content_file")})
+        return (self._mtime(self.catalog_path),) + tuple(
+            (name, self._mtime(os.path.join(self.content_dir, name))) for name in content_files
+        )
+
+    def _load(self):
+        """Relit le catalogue et le contenu de chaque prompt"""
+        if not os.path.exists(self.catalog_path):
+            self._prompts, self._by_id, self._contents = [], {}, {}
+            self._fingerprint = self._current_fingerprint([])
+            return
+
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as f:
+                prompts = json.load(f)
+        except (OSError, ValueError) as e:
+            # Fichier en cours d'édition : on conserve la version précédente jusqu'à la prochaine modification
+            print(f"⚠️ Catalogue de prompts illisible, version précédente conservée : {e}")
+            self._fingerprint = self._current_fingerprint(self._prompts)
+            return
+
+        contents = {}
+        for prompt in prompts:
+            content_file = prompt.get("content_file")
+            content = None
+            if content_file:
+                try:
+                    with open(os.path.join(self.content_dir, content_file), "r", encoding="utf-8") as f:
+                        content = f.read()
+                except OSError:
+                    content = None
+            prompt["content_hash"] = hashlib.sha256(content.encode("utf-8")).hexdigest() if content is not None else None
+            contents[prompt["id"]] = content
+
+        self._prompts = prompts
+        self._by_id = {prompt["id"]: prompt for prompt in prompts}
+        self._contents = contents
+        self._fingerprint = self._current_fingerprint(prompts)
+
+    def _refresh(self):
+        """Recharge le registre si l'un des fichiers a été modifié"""
+        now = time.monotonic()
+        with self._lock:
+            if self._fingerprint is not None and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            if self._fingerprint != self._current_fingerprint(self._prompts):
+                self._load()
+
+    def list_prompts(self) -> List[Dict]:
+        """Métadonnées de tous les prompts, dans l'ordre du catalogue"""
+        self._refresh()
+        return [dict(prompt) for prompt in self._prompts]
+
+    def get_metadata(self, prompt_id: str) -> Optional[Dict]:
+        self._refresh()
+        prompt = self._by_id.get(prompt_id)
+        return dict(prompt) if prompt else None
+
+    def get(self, prompt_id: str) -> Tuple[Dict, str]:
+        """Retourne les métadonnées d'un prompt et son contenu"""
+        self._refresh()
+        prompt = self._by_id.get(prompt_id)
+        if not prompt:
+            raise ValueError(f"Prompt introuvable : {prompt_id}")
+        if not prompt.get("content_file"):
+            raise ValueError("Le champ 'content_file' est manquant")
+
+        content = self._contents.get(prompt_id)
+        if content is None:
+            raise FileNotFoundError(f"Fichier de prompt manquant : {os.path.join(self.content_dir, prompt['content_file'])}")
+        return dict(prompt), content
+
+    def get_content_hash(self, prompt_id: str) -> Optional[str]:
+        prompt = self.get_metadata(prompt_id)
+        return prompt.get("content_hash") if prompt else None
+
+    def default_prompt_id(self) -> Optional[str]:
+        """Identifiant du premier prompt du catalogue"""
+        self._refresh()
+        return self._prompts[0]["id"] if self._prompts else None
+
+
+# Instance globale
+prompt_registry = PromptRegistry(
+    Config.PROMPTS_JSON,
+    Config.PROMPT_CONTENT_DIR,
+    check_interval=Config.PROMPTS_RELOAD_INTERVAL
+)
@@ -0,0 +1,280 @@
+"""
+Routage des appels entre fournisseurs d'IA
+
+Chaque appel part vers le fournisseur demandé (ia_mode). Le routeur suit, pour
+chaque fournisseur, la latence et le taux d'erreur sur les derniers appels, et
+ouvre un disjoncteur après plusieurs échecs consécutifs : le fournisseur est alors
+ignoré jusqu'à un appel d'essai après le délai de réarmement.
+
+Si un fournisseur secondaire est configuré :
+- un échec ou un disjoncteur ouvert bascule l'appel sur le secondaire ;
+- au-delà du budget de latence, la même requête est envoyée au secondaire et la
+  première réponse valide est retenue (requête de couverture).
+Aucun secondaire n'est configuré par défaut pour l'IA locale : les documents ne
+quittent pas la machine sans configuration explicite.
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+from utils.llm_dispatcher import RetryableError, llm_dispatcher
+from utils.local_ai import local_ai
+from utils.openai_utils import call_openai_api, stream_openai_api
+from utils.token_budget import token_budget
+
+
+class CircuitBreaker:
+    """Disjoncteur : ouvert après failure_threshold échecs consécutifs, réessayé après reset_timeout.
+
+    En demi-ouverture, un seul appel d'essai passe et son résultat décide : un succès
+    referme le disjoncteur, un échec le rouvre. Un essai resté sans résultat (réponse
+    en streaming abandonnée) expire après reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed, open, half_open
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self, now: float):
+        if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.trial_started_at is not None and now - self.trial_started_at >= self.reset_timeout:
+            self.trial_started_at = None
+
+    def allow(self) -> bool:
+        """Indique si un appel pourrait passer, sans réserver l'essai de la demi-ouverture"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self.state == "closed" or (self.state == "half_open" and self.trial_started_at is None)
+
+    def begin(self) -> bool:
+        """Réserve le passage d'un appel au moment de l'envoyer ; en demi-ouverture, un seul à la fois"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and self.trial_started_at is None:
+                self.trial_started_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.trial_started_at = None
+
+    def record_failure(self) -> bool:
+        """Enregistre un échec ; retourne True si le disjoncteur vient de s'ouvrir"""
+        with self._lock:
+            self.trial_started_at = None
+            self.consecutive_failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class ProviderRouter:
+    """Choix du fournisseur, bascule, requêtes de couverture et statistiques par fournisseur"""
+
+    def __init__(self, providers: Dict[str, Callable[[str, str, Optional[str]], str]], is_ready: Dict[str, Callable[[], bool]],
+                 secondaries: Dict[str, Optional[str]], latency_budget: float = 0,
+                 failure_threshold: int = 5, reset_timeout: float = 60.0, window: int = 100, max_workers: int = 16,
+                 streamers: Dict[str, Callable[[str, str, Optional[str]], Iterator[str]]] = None):
+        self.providers = providers
+        self.streamers = streamers or {}
+        self.is_ready = is_ready
+        self.secondaries = secondaries
+        # Délai (s) avant la requête de couverture ; 0 désactive la couverture
+        self.latency_budget = latency_budget
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_timeout) for name in providers}
+        self._outcomes = {name: deque(maxlen=window) for name in providers}
+        self._counters = {"hedged": 0, "hedge_wins": 0, "fallbacks": 0}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._max_workers = max_workers
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="llm-router")
+            return self._executor
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def record(self, provider: str, seconds: float, error: Optional[Exception] = None):
+        """Enregistre le résultat d'un appel (latence, succès) et met à jour le disjoncteur"""
+        with self._lock:
+            self._outcomes[provider].append((seconds, error is None))
+        if error is None:
+            self.breakers[provider].record_success()
+        elif self.breakers[provider].record_failure():
+            print(f"⚠️ Disjoncteur ouvert pour {provider} après {self.breakers[provider].consecutive_failures} échecs: {error}")
+
+    def _run(self, provider: str, prompt: str, system_role: str, model: Optional[str] = None) -> str:
+        if not self.breakers[provider].begin():
+            raise Exception(f"Appel d'essai déjà en cours pour {provider} (disjoncteur demi-ouvert)")
+        started = time.monotonic()
+        try:
+            result = self.providers[provider](prompt, system_role, model)
+        except Exception as e:
+            self.record(provider, time.monotonic() - started, e)
+            raise
+        self.record(provider, time.monotonic() - started)
+        return result
+
+    def candidates(self, preferred: str) -> List[str]:
+        """Fournisseurs utilisables dans l'ordre : demandé puis secondaire"""
+        names = [preferred]
+        secondary = self.secondaries.get(preferred)
+        if secondary and secondary != preferred and secondary in self.providers:
+            names.append(secondary)
+
+        usable = []
+        for index, name in enumerate(names):
+            # Le fournisseur demandé reste tenté s'il n'a pas de secondaire : son erreur est plus parlante
+            if not self.is_ready[name]() and (index > 0 or len(names) > 1):
+                continue
+            if self.breakers[name].allow():
+                usable.append(name)
+        return usable
+
+    def _select(self, preferred: str) -> List[str]:
+        candidates = self.candidates(preferred)
+        if not candidates:
+            raise Exception(f"Aucun fournisseur d'IA disponible pour le mode {preferred} (disjoncteur ouvert)")
+        if candidates[0] != preferred:
+            self._count("fallbacks")
+        return candidates
+
+    def _stream_run(self, provider: str, prompt: str, system_role: str, model: Optional[str] = None) -> Iterator[str]:
+        started = time.monotonic()
+        try:
+            yield from self.streamers[provider](prompt, system_role, model)
+        except Exception as e:
+            self.record(provider, time.monotonic() - started, e)
+            raise
+        self.record(provider, time.monotonic() - started)
+
+    def stream(self, prompt: str, system_role: str, preferred: str,
+               models: Dict[str, str] = None) -> Tuple[str, Iterator[str]]:
+        """Retourne (fournisseur, générateur de la réponse) ; bascule possible, pas de couverture"""
+        for provider in self._select(preferred):
+            if self.breakers[provider].begin():
+                return provider, self._stream_run(provider, prompt, system_role, (models or {}).get(provider))
+        raise Exception(f"Aucun fournisseur d'IA disponible pour le mode {preferred} (appel d'essai en cours)")
+
+    def call(self, prompt: str, system_role: str, preferred: str, models: Dict[str, str] = None) -> Tuple[str, str]:
+        """Envoie le prompt et retourne (réponse, fournisseur qui l'a produite).
+
+        models indique le modèle à utiliser pour chaque fournisseur (modèle par défaut sinon).
+        """
+        models = models or {}
+        candidates = self._select(preferred)
+        if len(candidates) == 1:
+            return self._run(candidates[0], prompt, system_role, models.get(candidates[0])), candidates[0]
+
+        primary, secondary = candidates
+        executor = self._get_executor()
+        pending = {executor.submit(self._run, primary, prompt, system_role, models.get(primary)): primary}
+        secondary_started = hedged = False
+        errors = []
+        while pending:
+            timeout = self.latency_budget if not secondary_started and self.latency_budget > 0 else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Budget de latence dépassé : requête de couverture vers le secondaire
+                self._count("hedged")
+                pending[executor.submit(self._run, secondary, prompt, system_role, models.get(secondary))] = secondary
+                secondary_started = hedged = True
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider} : {e}")
+                    continue
+                # La requête perdante se termine en arrière-plan ; son résultat n'est gardé que dans les statistiques
+                if hedged and provider == secondary:
+                    self._count("hedge_wins")
+                return result, provider
+
+            if not secondary_started:
+                # Échec du fournisseur principal : bascule sur le secondaire
+                self._count("fallbacks")
+                pending[executor.submit(self._run, secondary, prompt, system_role, models.get(secondary))] = secondary
+                secondary_started = True
+
+        raise Exception(" ; ".join(errors))
+
+    def get_stats(self) -> Dict:
+        providers = {}
+        with self._lock:
+            counters = dict(self._counters)
+            outcomes = {name: list(values) for name, values in self._outcomes.items()}
+        for name, values in outcomes.items():
+            latencies = sorted(seconds for seconds, ok in values if ok)
+            breaker = self.breakers[name]
+            providers[name] = {
+                "secondary": self.secondaries.get(name) or None,
+                "circuit": breaker.state,
+                "consecutive_failures": breaker.consecutive_failures,
+                "recent_calls": len(values),
+                "error_rate": round(sum(1 for _, ok in values if not ok) / len(values), 3) if values else None,
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None
+            }
+        return {"latency_budget": self.latency_budget, **counters, "providers": providers}
+
+
+def _call_openai(prompt: str, system_role: str, model: Optional[str] = None) -> str:
+    tokens = token_budget.count_prompt(model or Config.OPENAI_MODEL, system_role, prompt)
+    return llm_dispatcher.call("openai", call_openai_api, prompt, system_role, model, estimated_tokens=tokens).strip()
+
+def _analyze_with_local_ai(prompt: str, system_role: str, model: Optional[str] = None) -> str:
+    result = local_ai.analyze_document(prompt, system_role, model)
+    if result.get("success"):
+        return result.get("analysis", "")
+    if result.get("retryable"):
+        raise RetryableError(result.get("error"), result.get("retry_after"), result.get("status_code"))
+    raise Exception(result.get("error", "Erreur IA locale"))
+
+def _call_local(prompt: str, system_role: str, model: Optional[str] = None) -> str:
+    tokens = token_budget.count_prompt(model or local_ai.model, system_role, prompt)
+    return llm_dispatcher.call("local", _analyze_with_local_ai, prompt, system_role, model, estimated_tokens=tokens)
+
+def _stream_openai(prompt: str, system_role: str, model: Optional[str] = None) -> Iterator[str]:
+    tokens = token_budget.count_prompt(model or Config.OPENAI_MODEL, system_role, prompt)
+    return llm_dispatcher.stream("openai", stream_openai_api, prompt, system_role, model, estimated_tokens=tokens)
+
+def _stream_local(prompt: str, system_role: str, model: Optional[str] = None) -> Iterator[str]:
+    tokens = token_budget.count_prompt(model or local_ai.model, system_role, prompt)
+    return llm_dispatcher.stream("local", local_ai.stream_analysis, prompt, system_role, model, estimated_tokens=tokens)
+
+
+# Instance globale
+provider_router = ProviderRouter(
+    {"openai": _call_openai, "local": _call_local},
+    is_ready={"openai": lambda: bool(Config.OPENAI_API_KEY), "local": local_ai.is_available},
+    secondaries={"openai": Config.LLM_ROUTER_OPENAI_SECONDARY, "local": Config.LLM_ROUTER_LOCAL_SECONDARY},
+    latency_budget=Config.LLM_HEDGE_LATENCY_BUDGET,
+    failure_threshold=Config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=Config.LLM_CIRCUIT_RESET_TIMEOUT,
+    streamers={"openai": _stream_openai, "local": _stream_local}
+)
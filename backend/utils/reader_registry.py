@@ -0,0 +1,128 @@
+"""
+Registre des lecteurs de formats de fichiers
+
+Chaque format (pdf, docx, eml, txt, xlsx...) est associé à un lecteur enregistré
+par extension. Les dépendances lourdes des lecteurs sont importées au premier
+usage grâce à lazy_import, ce qui évite de les charger au démarrage du backend.
+"""
+
+import time
+import importlib
+import threading
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.startup_report import startup_report
+
+
+class LazyModule:
+    """Module importé lors du premier accès à l'un de ses attributs"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                self._module = importlib.import_module(self._name)
+                startup_report.record_lazy_import(self._name, (time.perf_counter() - start) * 1000)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._module or self._load(), attribute)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Retourne un module dont l'import est différé jusqu'à sa première utilisation"""
+    return LazyModule(name)
+
+
+def collect_text(chunks: Iterator[str], max_chars: Optional[int] = None) -> Tuple[str, bool]:
+    """Assemble les morceaux de texte et s'arrête dès que le budget de caractères est atteint.
+
+    Retourne le texte et un booléen indiquant si le document a été lu en entier.
+    """
+    parts = []
+    total = 0
+    complete = True
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            total += len(chunk)
+            if max_chars is not None and total >= max_chars and len("".join(parts).lstrip()) >= max_chars:
+                complete = False
+                break
+    finally:
+        chunks.close()
+
+    text = "".join(parts).strip()
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text, complete
+
+
+class FormatReader:
+    """Lecteur d'un format : lecture complète ou par morceaux successifs"""
+
+    def __init__(self, name: str, read: Optional[Callable[[str], str]] = None,
+                 iter_chunks: Optional[Callable[..., Iterable[str]]] = None,
+                 supports_budget: bool = False,
+                 preview: Optional[Callable[[str, int], str]] = None):
+        if read is None and iter_chunks is None:
+            raise ValueError(f"Le lecteur {name} doit fournir read ou iter_chunks")
+        self.name = name
+        self._read = read
+        self._iter_chunks = iter_chunks
+        # Un lecteur qui gère le budget reçoit max_chars et s'arrête de lui-même
+        self.supports_budget = supports_budget
+        self._preview = preview
+
+    def iter_chunks(self, path: str, max_chars: Optional[int] = None) -> Iterator[str]:
+        """Génère le texte par morceaux (un seul morceau si le format ne le permet pas)"""
+        if self._iter_chunks is not None and self.supports_budget:
+            yield from self._iter_chunks(path, max_chars)
+        elif self._iter_chunks is not None:
+            yield from self._iter_chunks(path)
+        else:
+            yield self._read(path)
+
+    def read_preview(self, path: str, max_chars: int) -> str:
+        """Retourne le début du texte en ne lisant que les premiers morceaux du fichier"""
+        if self._preview is not None:
+            return self._preview(path, max_chars)
+        text, _ = collect_text(self.iter_chunks(path, max_chars), max_chars)
+        return text
+
+    def read(self, path: str) -> str:
+        """Retourne tout le texte du fichier"""
+        if self._read is not None:
+            return self._read(path)
+        return "".join(self.iter_chunks(path)).strip()
+
+
+class ReaderRegistry:
+    """Associe les extensions de fichiers à leur lecteur"""
+
+    def __init__(self):
+        self._readers: Dict[str, FormatReader] = {}
+
+    def register(self, extensions: Iterable[str], reader: FormatReader):
+        for ext in extensions:
+            self._readers[ext.lower()] = reader
+
+    def get_reader(self, path: str) -> FormatReader:
+        """Retourne le lecteur associé à l'extension du fichier"""
+        ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+        reader = self._readers.get(ext)
+        if reader is None:
+            raise ValueError(f"Type de fichier non supporté : .{ext}")
+        return reader
+
+    def supported_extensions(self) -> list:
+        return sorted(self._readers)
+
+
+# Instance globale
+reader_registry = ReaderRegistry()
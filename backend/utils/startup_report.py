@@ -0,0 +1,76 @@
+"""
+Rapport de démarrage du backend
+
+Mesure le coût d'import de chaque module chargé au démarrage ainsi que celui
+des dépendances lourdes chargées à la demande (PyMuPDF, openpyxl, Tesseract...),
+afin de vérifier que le backend répond rapidement après son lancement.
+"""
+
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class StartupReport:
+    """Collecte les temps d'import au démarrage et lors des chargements différés"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.ready_after_ms = None
+        self.startup_imports: List[Dict] = []
+        self.lazy_imports: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str):
+        """Mesure le temps d'un bloc d'import et les nouveaux paquets qu'il a chargés"""
+        modules_before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Seuls les paquets hors bibliothèque standard sont listés
+            new_packages = sorted({
+                module.split(".", 1)[0] for module in set(sys.modules) - modules_before
+            } - set(sys.stdlib_module_names) - {"__mp_main__"})
+            new_packages = [package for package in new_packages if not package.startswith("_")]
+            # Modules du projet importés en cascade : leur coût est inclus dans ce bloc
+            project_modules = sorted(
+                module for module in set(sys.modules) - modules_before
+                if module.startswith("utils.") and module != name
+            )
+            with self._lock:
+                self.startup_imports.append({
+                    "module": name,
+                    "duration_ms": round(elapsed_ms, 1),
+                    "loaded_packages": new_packages,
+                    "includes_modules": project_modules
+                })
+
+    def record_lazy_import(self, name: str, duration_ms: float):
+        """Enregistre le chargement différé d'une dépendance"""
+        with self._lock:
+            self.lazy_imports.append({
+                "module": name,
+                "duration_ms": round(duration_ms, 1),
+                "after_startup_ms": round((time.perf_counter() - self.started_at) * 1000, 1)
+            })
+
+    def mark_ready(self):
+        """Marque la fin du démarrage du backend"""
+        self.ready_after_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            return {
+                "ready_after_ms": self.ready_after_ms,
+                "startup_imports": sorted(self.startup_imports, key=lambda item: -item["duration_ms"]),
+                "lazy_imports": list(self.lazy_imports)
+            }
+
+
+# Instance globale
+startup_report = StartupReport()
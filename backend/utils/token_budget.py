@@ -0,0 +1,222 @@
+"""
+Budget de jetons des prompts
+
+Le texte des documents n'est plus tronqué à un nombre fixe de caractères mais au
+nombre de jetons disponible dans la fenêtre de contexte du modèle : une fraction
+cible de la fenêtre, moins la réserve laissée à la réponse et les jetons du prompt
+lui-même. La coupe se fait sur une fin de page, de paragraphe ou de phrase.
+
+Les jetons sont comptés par un estimateur propre à chaque modèle : tiktoken s'il
+est installé, sinon un ratio de caractères par jeton. D'autres estimateurs peuvent
+être enregistrés avec register_estimator. Les jetons réellement facturés, renvoyés
+par OpenAI et Ollama, sont comparés aux estimations ; l'écart mesuré corrige
+ensuite les estimations du modèle.
+"""
+
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from utils.reader_registry import lazy_import
+
+tiktoken = lazy_import("tiktoken")
+
+# Jetons ajoutés par le format des messages de chat (rôles, séparateurs)
+MESSAGE_OVERHEAD_TOKENS = 8
+
+# Fenêtres de contexte par préfixe de nom de modèle (le plus long préfixe l'emporte)
+CONTEXT_WINDOWS = {
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+
+# Coupes préférées, de la plus forte à la plus faible, et part minimale du texte conservée
+BOUNDARIES = [
+    (re.compile(r"\f"), 0.8),  # Saut de page
+    (re.compile(r"\n\s*\n"), 0.85),  # Paragraphe
+    (re.compile(r"[.!?…](?=\s)"), 0.9),  # Phrase
+    (re.compile(r"\s"), 0.95),
+]
+
+
+class CharRatioEstimator:
+    """Estimation par nombre moyen de caractères par jeton"""
+
+    def __init__(self, chars_per_token: float):
+        self.name = f"chars/{chars_per_token}"
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class TiktokenEstimator:
+    """Comptage exact avec un encodage tiktoken"""
+
+    def __init__(self, encoding_name: str):
+        self.name = f"tiktoken/{encoding_name}"
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def _tiktoken_or_ratio(encoding_name: str, chars_per_token: float) -> Callable[[], object]:
+    def factory():
+        try:
+            return TiktokenEstimator(encoding_name)
+        except Exception as e:
+            # tiktoken absent, ou encodage impossible à télécharger hors ligne
+            print(f"⚠️ tiktoken indisponible ({e}), estimation à {chars_per_token} caractères par jeton")
+            return CharRatioEstimator(chars_per_token)
+    return factory
+
+
+class TokenBudgetManager:
+    """Estimateurs par modèle, budget d'entrée, coupe du texte et suivi estimé / réel"""
+
+    def __init__(self, target_fraction: float, output_reserve: int, max_input_tokens: int = 0,
+                 default_context_window: int = 8192, local_context_window: int = 8192):
+        self.target_fraction = target_fraction
+        self.output_reserve = output_reserve
+        self.max_input_tokens = max_input_tokens
+        self.default_context_window = default_context_window
+        self.local_context_window = local_context_window
+
+        # (préfixe du modèle, fabrique d'estimateur), le plus long préfixe l'emporte ; "" = défaut
+        self._factories: List[Tuple[str, Callable[[], object]]] = []
+        self._estimators: Dict[str, object] = {}
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def register_estimator(self, model_prefix: str, factory: Callable[[], object]):
+        """Associe un estimateur (objet avec count(text)) aux modèles commençant par model_prefix"""
+        with self._lock:
+            self._factories.append((model_prefix, factory))
+            self._estimators.clear()
+
+    def estimator(self, model: str):
+        with self._lock:
+            estimator = self._estimators.get(model)
+            if estimator is None:
+                prefix, factory = max(
+                    ((p, f) for p, f in self._factories if model.startswith(p)), key=lambda item: len(item[0])
+                )
+                estimator = self._estimators[model] = factory()
+            return estimator
+
+    def _correction(self, model: str) -> float:
+        """Rapport réel / estimé mesuré sur les appels du modèle (1 tant qu'il y en a moins de 5)"""
+        with self._lock:
+            usage = self._usage.get(model)
+            if not usage or usage["calls"] < 5 or not usage["estimated_prompt_tokens"]:
+                return 1.0
+            ratio = usage["actual_prompt_tokens"] / usage["estimated_prompt_tokens"]
+        return min(max(ratio, 0.5), 2.0)
+
+    def count(self, model: str, text: str) -> int:
+        """Jetons estimés pour ce texte, corrigés par l'écart mesuré sur le modèle"""
+        return math.ceil(self.estimator(model).count(text) * self._correction(model))
+
+    def count_prompt(self, model: str, *texts: str) -> int:
+        """Jetons d'entrée estimés d'un appel : textes des messages et leur format"""
+        return self.count(model, "".join(text for text in texts if text)) + MESSAGE_OVERHEAD_TOKENS
+
+    def context_window(self, provider: str, model: str) -> int:
+        if provider == "local":
+            return self.local_context_window
+        prefixes = [prefix for prefix in CONTEXT_WINDOWS if model.startswith(prefix)]
+        return CONTEXT_WINDOWS[max(prefixes, key=len)] if prefixes else self.default_context_window
+
+    def input_budget(self, provider: str, model: str, fixed_text: str, output_tokens: Optional[int] = None) -> int:
+        """Jetons disponibles pour le texte des documents, une fois le prompt et la réponse réservés"""
+        window = self.context_window(provider, model)
+        output_tokens = self.output_reserve if output_tokens is None else output_tokens
+        total = min(int(window * self.target_fraction), window - output_tokens)
+        if self.max_input_tokens:
+            total = min(total, self.max_input_tokens)
+        return max(total - self.count(model, fixed_text) - MESSAGE_OVERHEAD_TOKENS, 0)
+
+    def truncate(self, model: str, text: str, max_tokens: int) -> Tuple[str, bool]:
+        """Coupe le texte à max_tokens sur la meilleure limite possible ; retourne (texte, tronqué)"""
+        tokens = self.count(model, text)
+        if tokens <= max_tokens:
+            return text, False
+        if max_tokens <= 0:
+            return "", True
+
+        # Longueur proportionnelle, réduite jusqu'à tenir dans le budget
+        length = int(len(text) * max_tokens / tokens)
+        while length > 0 and self.count(model, text[:length]) > max_tokens:
+            length = int(length * 0.95)
+
+        for pattern, min_share in BOUNDARIES:
+            cuts = [match.end() for match in pattern.finditer(text, int(length * min_share), length)]
+            if cuts:
+                return text[:cuts[-1]].rstrip(), True
+        return text[:length], True
+
+    def allocate(self, model: str, texts: List[str], max_tokens: int) -> List[str]:
+        """Partage le budget entre plusieurs textes : les plus courts sont gardés entiers,
+        le reste est réparti à parts égales entre les plus longs"""
+        sizes = [self.count(model, text) for text in texts]
+        shares = [0] * len(texts)
+        remaining, pending = max_tokens, sorted(range(len(texts)), key=lambda i: sizes[i])
+        while pending:
+            share = remaining // len(pending)
+            index = pending.pop(0)
+            shares[index] = min(sizes[index], share)
+            remaining -= shares[index]
+        return [text if shares[i] >= sizes[i] else self.truncate(model, text, shares[i])[0] for i, text in enumerate(texts)]
+
+    def record_usage(self, model: str, prompt_text: str, actual_prompt_tokens: Optional[int],
+                     actual_completion_tokens: Optional[int] = None):
+        """Compare les jetons d'entrée estimés à ceux rapportés par le fournisseur"""
+        if not actual_prompt_tokens:
+            return
+        estimated = self.estimator(model).count(prompt_text) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            usage = self._usage.setdefault(model, {
+                "calls": 0, "estimated_prompt_tokens": 0, "actual_prompt_tokens": 0, "actual_completion_tokens": 0
+            })
+            usage["calls"] += 1
+            usage["estimated_prompt_tokens"] += estimated
+            usage["actual_prompt_tokens"] += actual_prompt_tokens
+            usage["actual_completion_tokens"] += actual_completion_tokens or 0
+
+    def signature(self) -> Dict:
+        """Paramètres qui influencent la coupe des textes (inclus dans les clés du cache des réponses)"""
+        return {
+            "target_fraction": self.target_fraction,
+            "output_reserve": self.output_reserve,
+            "max_input_tokens": self.max_input_tokens
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            usage = {model: dict(values) for model, values in self._usage.items()}
+        for model, values in usage.items():
+            values["estimator"] = self.estimator(model).name
+            values["actual_vs_estimated"] = round(
+                values["actual_prompt_tokens"] / values["estimated_prompt_tokens"], 3
+            ) if values["estimated_prompt_tokens"] else None
+        return {**self.signature(), "models": usage}
+
+
+# Instance globale
+token_budget = TokenBudgetManager(
+    target_fraction=Config.LLM_CONTEXT_TARGET_FRACTION,
+    output_reserve=Config.LLM_OUTPUT_RESERVE_TOKENS,
+    max_input_tokens=Config.LLM_MAX_INPUT_TOKENS,
+    default_context_window=Config.LLM_DEFAULT_CONTEXT_WINDOW,
+    local_context_window=Config.OLLAMA_NUM_CTX
+)
+# Le français compte environ 3,5 caractères par jeton avec les encodages OpenAI
+token_budget.register_estimator("", _tiktoken_or_ratio("cl100k_base", 3.5))
+token_budget.register_estimator("gpt-4o", _tiktoken_or_ratio("o200k_base", 3.5))
+token_budget.register_estimator("gpt-4.1", _tiktoken_or_ratio("o200k_base", 3.5))
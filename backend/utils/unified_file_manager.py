@@ -10,6 +10,8 @@ import os
 import json
 import shutil
 import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
@@ -33,8 +35,9 @@ class UnifiedFileManager:
         self.registry = self._load_registry()
         self.search_index = self._load_search_index()
         
-        # Cache pour les recherches fréquentes
-        self._file_hash_cache = {}
+        # Hash par chemin, valable tant que la taille et la date de modification sont inchangées (LRU borné)
+        self._file_hash_cache = OrderedDict()
+        self._file_hash_lock = threading.Lock()
     
     def _load_registry(self) -> Dict:
         """Charge le registre des fichiers analysés"""
@@ -74,8 +77,19 @@ class UnifiedFileManager:
     
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calcule le hash SHA256 d'un fichier"""
-        if file_path in self._file_hash_cache:
-            return self._file_hash_cache[file_path]
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            print(f"Erreur lors du calcul du hash pour {file_path}: {e}")
+            return ""
+
+        # Le cache est invalidé dès que la taille ou la date de modification change
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._file_hash_lock:
+            cached = self._file_hash_cache.get(file_path)
+            if cached is not None and cached[0] == signature:
+                self._file_hash_cache.move_to_end(file_path)
+                return cached[1]
         
         sha256 = hashlib.sha256()
         try:
@@ -83,11 +97,19 @@ class UnifiedFileManager:
                 while chunk := f.read(65536):
                     sha256.update(chunk)
             hash_value = sha256.hexdigest()
-            self._file_hash_cache[file_path] = hash_value
+            with self._file_hash_lock:
+                self._file_hash_cache[file_path] = (signature, hash_value)
+                self._file_hash_cache.move_to_end(file_path)
+                while len(self._file_hash_cache) > Config.FILE_HASH_CACHE_SIZE:
+                    self._file_hash_cache.popitem(last=False)
             return hash_value
         except Exception as e:
             print(f"Erreur lors du calcul du hash pour {file_path}: {e}")
             return ""
+
+    def get_file_hash(self, file_path: str) -> str:
+        """Retourne le hash SHA256 d'un fichier (mis en cache tant qu'il n'est pas modifié)"""
+        return self._calculate_file_hash(file_path)
     
     def _generate_filename(self, original_name: str, status: str) -> str:
         """Génère un nom de fichier au format YYMMDD-STATUT-nom_original"""
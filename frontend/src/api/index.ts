@@ -45,6 +45,66 @@ export async function analyzeFile(
   return response.json();
 }
 
+// Analyse en streaming (Server-Sent Events) : onToken reçoit chaque morceau de la réponse
+export async function analyzeFileStream(
+  filePath: string,
+  promptId: string,
+  iaMode: 'openai' | 'local' = 'openai',
+  onToken: (content: string) => void,
+  options: { overwrite?: boolean; useOcr?: boolean } = {}
+) {
+  const response = await fetch("/api/analyze/stream", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      file_path: filePath,
+      prompt_id: promptId,
+      ia_mode: iaMode,
+      overwrite: options.overwrite || false,
+      use_ocr: options.useOcr || false
+    }),
+  });
+
+  if (!response.ok || !response.body) {
+    const err = await response.json();
+    throw new Error(err.error || "Erreur serveur");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Les événements sont séparés par une ligne vide
+    let separator;
+    while ((separator = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, separator);
+      buffer = buffer.slice(separator + 2);
+
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+
+      if (event === "token") {
+        onToken(data.content);
+      } else if (event === "done") {
+        return data;
+      } else if (event === "confirmation_required") {
+        return { success: false, confirmation_required: true, message: data.message };
+      } else if (event === "error") {
+        throw new Error(data.error || "Erreur lors de l'analyse");
+      }
+    }
+  }
+
+  throw new Error("Flux d'analyse interrompu");
+}
+
 export async function analyzeMultipleFiles(
   filePaths: string[],
   promptId: string,